@@ -1,6 +1,6 @@
 from machine import SPI, Pin
 from lib import st7789py as st7789
-from assets import testcard
+from lib.mhimage import Image
 import time
 
 _DISPLAY_WIDTH = 240
@@ -18,7 +18,7 @@ tft = st7789.ST7789(
 	color_order=st7789.BGR
 )
 
-tft.pbitmap(testcard, 0, 0)
+Image("/assets/testcard.mhi").draw(tft, 0, 0)
 
 while True:
 	time.sleep(1)
\ No newline at end of file
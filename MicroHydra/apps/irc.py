@@ -1,7 +1,8 @@
 _DISPLAY_WIDTH = const(240)
 _DISPLAY_HEIGHT = const(135)
 import gc
-fbuf = bytearray(_DISPLAY_WIDTH * _DISPLAY_HEIGHT * 2)
+# one spare row, for clipping (see ST7789.push_clip)
+fbuf = bytearray(_DISPLAY_WIDTH * (_DISPLAY_HEIGHT + 1) * 2)
 gc.collect()
 from lib import st7789fbuf as st7789
 from machine import Pin, SPI
@@ -20,8 +21,9 @@ tft = st7789.ST7789(
 	reserved_bytearray = fbuf
 )
 
-import network
-nic = network.WLAN(network.STA_IF)
+# the WLAN object needs a lot of memory, so make it early
+from lib import mhwifi
+wifi = mhwifi.WiFi()
 
 import json, time
 import usocket as socket
@@ -69,6 +71,7 @@ config = {}
 irc = None
 kb = None
 screen = None
+wifi_status = None
 pressed_keys = []
 prev_pressed_keys = []
 
@@ -84,41 +87,16 @@ def init_config():
 		print("could not load settings from config.json")
 	return False
 
-def init_nic():
-	global nic
-	gc.collect()
-	if not nic:
-		try:
-			nic = network.WLAN(network.STA_IF)
-		except RuntimeError as e:
-			print(e)
-			try:
-				time.sleep(5)
-				nic = network.WLAN(network.STA_IF)
-			except RuntimeError as e:
-				tft.bitmap_text(font, "failed to setup WLAN!", 0, 0, st7789.RED)
-				print("Wifi WLAN object couldnt be created. Gave this error:",e)
-				import micropython
-				print(micropython.mem_info(),micropython.qstr_info())
-				return False
-
-	if config["wifi_ssid"] == '':
-		print(config)
-		print("wifi information not found in config")
-		return False
-
-	if not nic.active(): # turn on wifi if it isn't already
-		nic.active(True)
-	if not nic.isconnected(): # try connecting
-		try:
-			nic.connect(config["wifi_ssid"], config["wifi_pass"])
-			while not nic.isconnected():
-				pass
-		except OSError as e:
-			print("wifi_sync_rtc had this error when connecting:",str(e))
-			return False
-	
-	return True
+def update_wifi():
+	# report wifi status changes in the Status channel, and connect to irc once wifi is up
+	global wifi_status
+	status = wifi.update()
+	if status != wifi_status:
+		wifi_status = status
+		irc.channels[_STATUS_NAME].append_line(f"* WiFi: {wifi.status_text()}")
+	if status == mhwifi.CONNECTED and not irc.sock:
+		irc.channels[_STATUS_NAME].append_line(f"* Connecting to {irc.server}")
+		irc.connect()
 
 def http_get(url):
     import socket
@@ -156,7 +134,7 @@ def handle_keyboard():
 				irc.current_channel += 1
 				irc.current_channel = irc.current_channel % len(irc.channels)
 				screen.refresh_needed = _REFRESH_FULL
-			elif key == "ENT":
+			elif key == "ENT" and irc.sock:
 				input = irc.channels[channel].input_buffer.strip()
 				if input.startswith('/'):
 					parse_command(input)
@@ -204,6 +182,7 @@ class IRC:
 		self.buffer = ""
 		self.current_channel = 0
 		self.serveruser = None
+		self.channels[_STATUS_NAME] = Channel(_STATUS_NAME)
 
 	def send_cmd(self, cmd, message):
 		command = f"{cmd} {message}\r\n".encode("utf-8")
@@ -223,7 +202,6 @@ class IRC:
 			self.send_cmd("PASS", self.password)
 		self.send_cmd("NICK", self.nickname)
 		self.send_cmd("USER", f"{self.nickname} * * :{self.nickname}")
-		self.channels[_STATUS_NAME] = Channel(_STATUS_NAME)
 
 	def receive(self):
 		try:
@@ -295,9 +273,11 @@ def init():
 		print("failed to open config!")
 		tft.bitmap_text(font, "failed to open config!", 0, 0, st7789.RED)
 		return False
-	if not init_nic():
-		print("no wifi config found!")
-		tft.bitmap_text(font, "no wifi config found!", 0, 0, st7789.RED)
+	# this only starts connecting, update_wifi() keeps it going from the main loop
+	wifi.connect(config.get("wifi_ssid", ""), config.get("wifi_pass", ""))
+	if wifi.status == mhwifi.FAILED:
+		print(f"wifi {wifi.status_text()}")
+		tft.bitmap_text(font, f"wifi {wifi.status_text()}", 0, 0, st7789.RED)
 		return False
 	
 	kb = keyboard.KeyBoard()
@@ -312,13 +292,15 @@ def init():
 		tft.bitmap_text(font, "no irc config found!", 0, 0, st7789.RED)
 		return False
 	
-	irc.connect()
 	screen.refresh_needed = _REFRESH_FULL
 	loop()
 
 def loop():
 	while True:
-		irc.receive()
+		if irc.sock:
+			irc.receive()
+		else:
+			update_wifi()
 
 		handle_keyboard()
 
@@ -1,23 +1,17 @@
-import network
-from lib import beeper
-
-# wifi and beeper consume most memory
-nic = network.WLAN(network.STA_IF)
-beep = beeper.Beeper()
-
 import gc
-gc.collect()
+# wifi and beeper consume the most memory, but they're only loaded once the config says they're needed (see main_loop)
 
 from font import vga1_8x16 as fontsmall
 from font import vga2_16x32 as font
-from machine import Pin, SDCard, SPI, ADC, RTC, reset
-import time, os, json, math, ntptime
-from lib import keyboard, beeper, battlevel
-from lib import microhydra as mh
+from machine import Pin, SDCard, SPI, RTC, reset
+import time, os, json
+from lib import keyboard, battlevel
 from lib.mhconfig import Config
 gc.collect()
 from lib import st7789py as st7789
 from launcher.icons import icons, battery
+from lib import mhprofile
+mhprofile.checkpoint("launcher imports")
 
 
 """
@@ -33,7 +27,7 @@ This program is designed to be used in conjunction with "main.py" apploader, to
 The basic app loading logic works like this:
  - apploader reads reset cause and RTC.memory to determine which app to launch
  - apploader launches 'launcher.py' when hard reset, or when RTC.memory is blank
- - launcher scans app directories on flash and SDCard to find apps
+ - launcher scans app directories on flash and SDCard to find apps (or reuses the list saved by the last scan)
  - launcher shows list of apps, allows user to select one
  - launcher stores path to app in RTC.memory, and soft-resets the device
  - apploader reads RTC.memory to find path of app to load
@@ -46,8 +40,6 @@ Because MicroPython completely resets between apps, the only "wasted" ram from t
 
 """
 
-#init beeper asap to help prevent volume bug
-beep = beeper.Beeper()
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Constants: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
 _TARGET_VSCSAD = const(40) # scrolling display "center"
@@ -57,9 +49,6 @@ _DISPLAY_WIDTH_HALF = const(120)
 _DISPLAY_HEIGHT = const(135)
 _DISPLAY_OFFBOUND = const(40)
 
-_MAX_WIFI_ATTEMPTS = const(1000)
-_MAX_NTP_ATTEMPTS = const(10)
-
 _WIDGET_BATTERY_X = const(212)
 _WIDGET_BATTERY_Y = const(4)
 _WIDGET_BATTERY_W = const(20)
@@ -70,6 +59,10 @@ _WIDGET_CLOCK_X = const(6)
 _WIDGET_CLOCK_Y = const(2)
 _WIDGET_CLOCK_W = const(58)
 _WIDGET_CLOCK_H = const(16)
+_WIDGET_SPINNER_X = const(196)
+
+# shown in the status bar while apps are being found
+_SPINNER_CHARS = "|/-\\"
 
 _UI_STATUS_H = const(18)
 _UI_ICON_X = const(104)
@@ -79,6 +72,9 @@ _UI_APP_CLEAR_W = const(200)
 _UI_APP_CLEAR_X = const(20)#display_width_half - _UI_APP_CLEAR_W / 2
 _UI_APPNAME_Y = const(80)
 
+# the result of the last app scan, so the next boot can skip it (see load_app_index)
+_APP_INDEX_PATH = "/appindex.json"
+
 special_apps = {
 	"ui_sound": "UI Sound",
 	"reload_apps": "Reload Apps",
@@ -101,6 +97,12 @@ battery_widget = []
 tft = None
 rtc = RTC()
 
+# only created when they're needed
+beep = None
+
+# contents of the app index file, as last loaded or saved
+app_index = None
+
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Finding Apps ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -108,106 +110,68 @@ rtc = RTC()
 
 
 
-def scan_apps(sd):
-	global widget_scroll_w
-	# first we need a list of apps located on the flash or SDCard
-
-	main_directory = os.listdir("/")
-	
+def mount_sd(sd):
+	"""Mount the SDCard at /sd, if it isn't mounted already. Returns the SDCard object (or None)."""
+	if "sd" in os.listdir("/"):
+		return sd
 	
-	# if the sd card is not mounted, we need to mount it.
-	if "sd" not in main_directory:
+	try:
+		sd = SDCard(slot=2, sck=Pin(40), miso=Pin(39), mosi=Pin(14), cs=Pin(12))
+	except OSError as e:
+		print(e)
+		print("SDCard couldn't be initialized. This might be because it was already initialized and not properly deinitialized.")
 		try:
-			sd = SDCard(slot=2, sck=Pin(40), miso=Pin(39), mosi=Pin(14), cs=Pin(12))
-		except OSError as e:
-			print(e)
-			print("SDCard couldn't be initialized. This might be because it was already initialized and not properly deinitialized.")
-			try:
-				sd.deinit()
-			except:
-				print("Couldn't deinitialize SDCard")
-				
-		try:
-			os.mount(sd, '/sd')
-		except OSError as e:
-			print(e)
-			print("Could not mount SDCard.")
-		except NameError as e:
-			print(e)
-			print("SDCard not mounted")
+			sd.deinit()
+		except:
+			print("Couldn't deinitialize SDCard")
 			
-		main_directory = os.listdir("/")
-
-	sd_directory = []
-	if "sd" in main_directory:
-		sd_directory = os.listdir("/sd")
-
-	# if the apps folder does not exist, create it.
-	if "apps" not in main_directory:
-		os.mkdir("/apps")
-		main_directory = os.listdir("/")
-		
-	# do the same for the sdcard apps directory
-	if "apps" not in sd_directory and "sd" in main_directory:
-		os.mkdir("/sd/apps")
-		sd_directory = os.listdir("/sd")
-
-
-
-	# if everything above worked, sdcard should be mounted (if available), and both app directories should exist. now look inside to find our apps:
-	main_app_list = os.listdir("/apps")
-	sd_app_list = []
-
-	if "sd" in main_directory:
-		try:
-			sd_app_list = os.listdir("/sd/apps")
-		except OSError as e:
-			print(e)
-			print("SDCard mounted but cant be opened; assuming it's been removed. Unmounting /sd.")
-			os.umount('/sd')
-
-
+	try:
+		os.mount(sd, '/sd')
+	except OSError as e:
+		print(e)
+		print("Could not mount SDCard.")
+	except NameError as e:
+		print(e)
+		print("SDCard not mounted")
+	return sd
+
+
+def dir_stamp(path):
+	"""
+		Return [mtime, size] for a directory, to tell if it (probably) changed since the last scan.
+		Returns None if it can't be read.
+	"""
+	try:
+		stat = os.stat(path)
+	except OSError:
+		return None
+	return [stat[8], stat[6]]
 
 
-	# now lets collect some separate app names and locations
-	app_names = []
+def find_apps(app_dirs):
+	"""
+		Build a dict of {app name: app path} from a list of (directory, [entries]).
+		if multiple apps share the same name, then we will simply use the app found most recently. 
+	"""
 	app_paths = {}
+	for directory, entries in app_dirs:
+		for entry in entries:
+			if entry.endswith(".py"):
+				app_paths[entry[:-3]] = f"{directory}/{entry}"
+			elif entry.endswith(".mpy"):
+				app_paths[entry[:-4]] = f"{directory}/{entry}"
+	return app_paths
 
-	for entry in main_app_list:
-		if entry.endswith(".py"):
-			this_name = entry[:-3]
-			
-			# the purpose of this check is to prevent dealing with duplicated apps.
-			# if multiple apps share the same name, then we will simply use the app found most recently. 
-			if this_name not in app_names:
-				app_names.append( this_name ) # for pretty display
-			
-			app_paths[f"{this_name}"] = f"/apps/{entry}"
 
-		elif entry.endswith(".mpy"):
-			this_name = entry[:-4]
-			if this_name not in app_names:
-				app_names.append( this_name )
-			app_paths[f"{this_name}"] = f"/apps/{entry}"
-			
-			
-	for entry in sd_app_list:
-		if entry.endswith(".py"): #repeat for sdcard
-			this_name = entry[:-3]
-			
-			if this_name not in app_names:
-				app_names.append( this_name )
-			
-			app_paths[f"{this_name}"] = f"/sd/apps/{entry}"
-			
-		elif entry.endswith(".mpy"):
-			this_name = entry[:-4]
-			if this_name not in app_names:
-				app_names.append( this_name )
-			app_paths[f"{this_name}"] = f"/sd/apps/{entry}"
-			
+def app_list(app_paths):
+	"""
+		Turn a dict of app paths into the (app_names, app_paths) shown by the launcher, including the special apps.
+	"""
+	global widget_scroll_w
+	app_paths = dict(app_paths)
+	
 	#sort alphabetically without uppercase/lowercase discrimination:
-	app_names.sort(key=lambda element: element.lower())
+	app_names = sorted(app_paths, key=lambda element: element.lower())
 	
 	#add an appname to refresh the app list
 	app_names.append(special_apps["reload_apps"])
@@ -219,7 +183,107 @@ def scan_apps(sd):
 	
 	widget_scroll_w = _DISPLAY_WIDTH // len(app_names)
 	
-	return app_names, app_paths, sd
+	return app_names, app_paths
+
+
+def load_app_index():
+	"""
+		Load the app list saved by the last scan_apps(), if the flash apps directory hasn't changed since.
+		Returns (app_names, app_paths), or None if a full scan is needed.
+		
+		Apps on the SDCard are taken from the index too, as checking them means mounting the card.
+		The index should be double-checked by a full scan once the launcher is up. (see scan_apps_steps)
+	"""
+	global app_index
+	try:
+		with open(_APP_INDEX_PATH, "r") as index_file:
+			index = json.loads(index_file.read())
+		if index["stamps"]["/apps"] != dir_stamp("/apps"):
+			return None
+		app_index = index
+		return app_list(index["apps"])
+	except (OSError, ValueError, KeyError, TypeError):
+		return None
+
+
+def save_app_index(stamps, app_paths):
+	"""Save the result of a scan, for load_app_index() to use on the next boot. Only writes if something changed."""
+	global app_index
+	index = {"stamps": stamps, "apps": app_paths}
+	if index == app_index:
+		return
+	app_index = index
+	try:
+		with open(_APP_INDEX_PATH, "w") as index_file:
+			index_file.write(json.dumps(index))
+	except OSError as e:
+		print(e)
+		print("Couldn't save the app index.")
+
+
+def flash_app_list():
+	"""
+		Quickly list just the apps on the flash, for when there's no usable app index.
+		Returns (app_names, app_paths)
+	"""
+	try:
+		entries = os.listdir("/apps")
+	except OSError:
+		# the apps folder does not exist yet
+		entries = []
+	return app_list(find_apps([("/apps", entries)]))
+
+
+def scan_apps_steps(sd):
+	"""
+		Do a full scan of the app directories on the flash and SDCard, a step at a time.
+		
+		This is a generator that yields the SDCard object (or None) between the slow steps,
+		so that the launcher can keep running while apps are found.
+		The SDCard is mounted last, so that a slow or missing card doesn't hold up anything else.
+		When finished, the result is saved to the app index, and (app_names, app_paths, sd) is returned.
+	"""
+	# if the apps folder does not exist, create it.
+	if "apps" not in os.listdir("/"):
+		os.mkdir("/apps")
+	app_dirs = [("/apps", os.listdir("/apps"))]
+	yield sd
+	
+	# if the sd card is not mounted, we need to mount it.
+	sd = mount_sd(sd)
+	yield sd
+	
+	# if everything above worked, sdcard should be mounted (if available). now look inside to find our apps:
+	if "sd" in os.listdir("/"):
+		try:
+			# do the same for the sdcard apps directory
+			if "apps" not in os.listdir("/sd"):
+				os.mkdir("/sd/apps")
+			yield sd
+			app_dirs.append(("/sd/apps", os.listdir("/sd/apps")))
+		except OSError as e:
+			print(e)
+			print("SDCard mounted but cant be opened; assuming it's been removed. Unmounting /sd.")
+			os.umount('/sd')
+
+	stamps = {directory: dir_stamp(directory) for directory, _ in app_dirs}
+	app_paths = find_apps(app_dirs)
+	save_app_index(stamps, app_paths)
+	
+	return app_list(app_paths) + (sd,)
+
+
+def scan_apps(sd):
+	"""
+		Do a full scan of the app directories on the flash and SDCard, all at once.
+		Returns (app_names, app_paths, sd)
+	"""
+	scan = scan_apps_steps(sd)
+	try:
+		while True:
+			next(scan)
+	except StopIteration as result:
+		return result.value
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Function Definitions: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -288,8 +352,21 @@ def draw_widgets(offset, app_selector_index, battlevel):
 	#battery
 	tft.bitmap_icons(battery, battery_widget[battlevel]["icon"], (config.palette[2],battery_widget[battlevel]["color"]), _WIDGET_BATTERY_X + offset, _WIDGET_BATTERY_Y)
 
+def draw_spinner(frame):
+	tft.text(fontsmall, _SPINNER_CHARS[frame % 4], _WIDGET_SPINNER_X, _WIDGET_CLOCK_Y, config["ui_color"], config.palette[2])
+
+def erase_spinner():
+	tft.fill_rect(_WIDGET_SPINNER_X, _WIDGET_CLOCK_Y, 8, _WIDGET_CLOCK_H, config.palette[2])
+
+def init_beeper():
+	global beep
+	from lib import beeper
+	beep = beeper.Beeper()
+
 def play_sound(notes, time_ms):
 	if config["ui_sound"]:
+		if beep is None: # UI sound was just turned on
+			init_beeper()
 		beep.play(notes, time_ms, config["volume"])
 
 def draw_app(offset, text, icon, label=None):
@@ -314,7 +391,7 @@ def main_loop():
 	global config
 	global widget_scroll_w
 	global battery_widget
-	global tft, beep, nic
+	global tft, beep
 
 	#bump up our clock speed so the UI feels smoother (240mhz is the max officially supported, but the default is 160mhz)
 	#machine.freq(240_000_000)
@@ -322,6 +399,14 @@ def main_loop():
 	
 	# load our config asap to support other processes
 	config = Config()
+	# main.py can't read the config, so it checks a flag file instead. keep it up to date:
+	if config["boot_profile"] != mhprofile.enabled:
+		mhprofile.set_enabled(config["boot_profile"])
+	
+	#init beeper asap to help prevent volume bug (if we're going to use it)
+	if config["ui_sound"]:
+		init_beeper()
+	mhprofile.checkpoint("load config")
 
 	battery_widget = [
 		{"icon": battery.EMPTY, "color": config.rgb_colors[0]},
@@ -332,39 +417,31 @@ def main_loop():
 		
 	# sync our RTC on boot, if set in settings
 	syncing_clock = config["sync_clock"]
-	sync_ntp_attemps = 0
-	connect_wifi_attemps = 0
 	
-	#wifi loves to give unknown runtime errors, just try it twice:
-	if not nic:
-		try:
-			nic = network.WLAN(network.STA_IF)
-		except RuntimeError as e:
-			print(e)
-			try:
-				nic = network.WLAN(network.STA_IF)
-			except RuntimeError as e:
-				print("Wifi WLAN object couldnt be created. Gave this error:",e)
-				import micropython
-				print(micropython.mem_info(),micropython.qstr_info())
-		
 	if config["wifi_ssid"] == '':
 		syncing_clock = False # no point in wasting resources if wifi hasn't been setup
 	elif rtc.datetime()[0] != 2000: #clock wasn't reset, assume that time has already been set
 		syncing_clock = False
-		
-	if syncing_clock: #enable wifi if we are syncing the clock
-		if not nic.active(): # turn on wifi if it isn't already
-			nic.active(True)
-		if not nic.isconnected(): # try connecting
-			try:
-				nic.connect(config["wifi_ssid"], config["wifi_pass"])
-			except OSError as e:
-				print("wifi_sync_rtc had this error when connecting:",e)
 	
-	#before anything else, we should scan for apps
+	# wifi is only loaded if we're syncing the clock.
+	# the connection runs alongside the launcher (see lib.mhwifi), so the UI doesn't wait for it.
+	clock_sync = None
+	if syncing_clock:
+		from lib import mhwifi
+		clock_sync = mhwifi.WiFi(sync_time=True, timezone=config["timezone"], keep_connected=False)
+		clock_sync.connect(config["wifi_ssid"], config["wifi_pass"])
+	
+	#before anything else, we should find our apps.
+	#the list saved by the last scan is used if it looks current, otherwise we start with just the apps on the flash.
+	#either way, a full scan (including the SDCard) runs in the background once the launcher is up.
 	sd = None #dummy var for when we cant mount SDCard
-	app_names, app_paths, sd = scan_apps(sd)
+	app_lists = load_app_index()
+	if app_lists is None:
+		app_lists = flash_app_list()
+	app_names, app_paths = app_lists
+	app_scan = scan_apps_steps(sd)
+	spinner_frame = 0
+	mhprofile.checkpoint("list apps")
 	app_selector_index = 0
 	prev_selector_index = 0
 	
@@ -392,6 +469,7 @@ def main_loop():
 	
 	tft.vscrdef(_DISPLAY_OFFBOUND, _DISPLAY_WIDTH, _DISPLAY_OFFBOUND)
 	tft.vscsad(_TARGET_VSCSAD)
+	mhprofile.checkpoint("init display")
 	
 	nonscroll_elements_displayed = False
 	
@@ -401,6 +479,8 @@ def main_loop():
 	delayed_redraw = False
 	
 	launching = False
+	# the boot profile is finished after the first pass of the main loop
+	boot_profiled = not mhprofile.enabled
 	current_vscsad = _TARGET_VSCSAD
 	prev_vscsad = _TARGET_VSCSAD
 	
@@ -469,6 +549,10 @@ def main_loop():
 						config_modified = True
 				
 				elif app_names[app_selector_index] == special_apps["reload_apps"]:
+					if app_scan:
+						# a full scan replaces the background one
+						app_scan = None
+						erase_spinner()
 					app_names, app_paths, sd = scan_apps(sd)
 					app_selector_index = 0
 					current_vscsad = _TARGET_VSCSAD + 2 # forces scroll animation triggers
@@ -543,13 +627,13 @@ def main_loop():
 			tft.vscsad(current_vscsad % _DISPLAY_WIDTH)
 			#draw_app(current_vscsad - _TARGET_VSCSAD, current_app_text, icon, label)
 			if scroll_direction == 1:
-				current_vscsad += math.floor(ease_out_cubic((current_vscsad - _TARGET_VSCSAD) / _DISPLAY_WIDTH_HALF) * 20) + 5
+				current_vscsad += int(ease_out_cubic((current_vscsad - _TARGET_VSCSAD) / _DISPLAY_WIDTH_HALF) * 20) + 5
 				if current_vscsad >= 160:
 					current_vscsad = -80
 					scroll_direction = 0
 					force_redraw_display = True
 			else:
-				current_vscsad -= math.floor(ease_out_cubic((current_vscsad - _TARGET_VSCSAD) / -_DISPLAY_WIDTH_HALF) * 20) + 5
+				current_vscsad -= int(ease_out_cubic((current_vscsad - _TARGET_VSCSAD) / -_DISPLAY_WIDTH_HALF) * 20) + 5
 				if current_vscsad <= -80:
 					current_vscsad = 160
 					scroll_direction = 0
@@ -624,41 +708,45 @@ def main_loop():
 		
 		#update prev app selector index to current one for next cycle
 		prev_selector_index = app_selector_index
+		
+		if not boot_profiled:
+			boot_profiled = True
+			mhprofile.checkpoint("first frame")
+			mhprofile.dump()
+			mhprofile.dump(mhprofile.LOG_PATH)
+		
+		# now that the launcher is up, find apps in the background, one step per loop.
+		# the steps only run while the display is settled, so they don't interrupt any animations.
+		if app_scan and nonscroll_elements_displayed and scroll_direction == 0:
+			try:
+				# draw the spinner first, so it shows while the (possibly slow) next step runs
+				draw_spinner(spinner_frame)
+				spinner_frame += 1
+				sd = next(app_scan)
+			except StopIteration as result:
+				app_scan = None
+				erase_spinner()
+				new_names, new_paths, sd = result.value
+				if new_paths != app_paths:
+					# keep the same app selected, if it's still there
+					current_name = app_names[app_selector_index]
+					app_names, app_paths = new_names, new_paths
+					app_selector_index = app_names.index(current_name) if current_name in app_names else 0
+					prev_selector_index = app_selector_index
+					# the scroll bar depends on the number of apps
+					erase_widgets()
+					nonscroll_elements_displayed = False
+					force_redraw_display = True
 			
 		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ WIFI and RTC: ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 		#~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 		
-		if syncing_clock:
-			if nic.isconnected():
-				try:
-					ntptime.settime()
-				except OSError:
-					sync_ntp_attemps += 1
-					
-				if rtc.datetime()[0] != 2000:
-					nic.disconnect()
-					nic.active(False) #shut off wifi
-					syncing_clock = False
-					#apply our timezone offset
-					time_list = list(rtc.datetime())
-					time_list[4] = time_list[4] + config["timezone"]
-					rtc.datetime(tuple(time_list))
-					print(f'RTC successfully synced to {rtc.datetime()} with {sync_ntp_attemps} attemps.')
-					
-				elif sync_ntp_attemps >= _MAX_NTP_ATTEMPTS:
-					nic.disconnect()
-					nic.active(False) #shut off wifi
-					syncing_clock = False
-					print(f"Syncing RTC aborted after {sync_ntp_attemps} attemps")
-				
-			elif connect_wifi_attemps >= _MAX_WIFI_ATTEMPTS:
-				nic.disconnect()
-				nic.active(False) #shut off wifi
-				syncing_clock = False
-				print(f"Connecting to wifi aborted after {connect_wifi_attemps} loops")
-			else:
-				connect_wifi_attemps += 1
+		if clock_sync:
+			status = clock_sync.update()
+			if status == mhwifi.DONE or status == mhwifi.FAILED:
+				# wifi has been shut off again, we don't need it anymore
+				clock_sync = None
 		
 # run the main loop!
 main_loop()
@@ -52,6 +52,7 @@ settings = [
 	('irc_server', {'type': 'string'}),
 	('irc_port', {'type': 'int', 'min': 0, 'max': 65535}),
 	('irc_pass', {'type': 'password'}),
+	('boot_profile', {'type': 'bool'}),
 	('confirm', {'type': 'confirm'})
 	]
 
@@ -67,7 +68,8 @@ config = {
 	"irc_nick": "m5user",
 	"irc_server": "irc.libera.chat",
 	"irc_port": 6667,
-	"irc_pass": ''
+	"irc_pass": '',
+	"boot_profile": False
 }
 
 #~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
@@ -629,7 +631,7 @@ def main_loop():
 					config[setting_name] = text
 				elif setting_type["type"] == "bool":
 					value = get_bool(setting_name)
-					config["sync_clock"] = value
+					config[setting_name] = value
 				elif setting_type["type"] == 'confirm': 
 					with open("config.json", "w") as conf: #save changes
 						conf.write(json.dumps(config))
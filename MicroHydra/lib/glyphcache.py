@@ -0,0 +1,179 @@
+'''
+
+This is a small, bounded, least-recently-used cache for pre-rendered font glyphs.
+
+It was made for the st7789 display drivers, so that redrawing the same text
+(like a console full of messages, or the launcher clock) doesn't have to
+expand every character into a new buffer on every frame.
+
+Glyphs are grouped into "pages" by font and colors, and looked up by codepoint within a page.
+Nothing is allocated when a glyph is found in the cache.
+
+Cached glyphs are also kept in a linked list, most recently used first,
+so finding the glyph to drop is O(1), no matter how many glyphs are cached.
+
+'''
+
+
+# glyph entries are lists, used as linked list nodes:
+_PREV = const(0)
+_NEXT = const(1)
+_PAGE = const(2)
+_CODEPOINT = const(3)
+_GLYPH = const(4)
+_SIZE = const(5)
+
+
+
+class _Page:
+	"""The glyphs for one font and color combination."""
+	def __init__(self, font, fg, bg):
+		self.font = font
+		self.fg = fg
+		self.bg = bg
+		# {codepoint: entry}
+		self.glyphs = {}
+
+
+
+class GlyphCache:
+	def __init__(self, max_bytes=None, line_width=240):
+		"""
+		Create a glyph cache.
+		params:
+			max_bytes:int
+				- The total size of the cached glyph buffers is kept under this many bytes.
+				  Least recently used glyphs are dropped to make room for new ones.
+				- If None, the size is picked from the fonts in use:
+				  every font used adds room for a full line of its (RGB565) glyphs.
+			line_width:int
+				- The width of a line of text in pixels, for sizing the cache when max_bytes is None.
+		"""
+		self.auto_size = max_bytes is None
+		self.max_bytes = 0 if max_bytes is None else max_bytes
+		self.line_width = line_width
+		self.bytes_used = 0
+		self.hits = 0
+		self.misses = 0
+		# {font: {fg: {bg: page}}}
+		self._fonts = {}
+		# fonts the cache has been sized for (when auto_size is True)
+		self._sized_fonts = {}
+		# the linked list of cached glyphs. the head is never removed,
+		# head[_NEXT] is the most recently used glyph and head[_PREV] is the least recently used.
+		self._head = [None, None, None, None, None, 0]
+		self._head[_PREV] = self._head[_NEXT] = self._head
+
+	def page(self, font, fg, bg):
+		"""
+		Get the page of glyphs for this font and color combination.
+		Look it up once per string, then use get() and put() for each character.
+		"""
+		if self.auto_size and font not in self._sized_fonts:
+			self._sized_fonts[font] = True
+			self.max_bytes += self.line_width * font.HEIGHT * 2
+
+		colors = self._fonts.get(font)
+		bgs = colors.get(fg) if colors else None
+		page = bgs.get(bg) if bgs else None
+		if page is None:
+			# pages are only kept once they hold a glyph (see put)
+			page = _Page(font, fg, bg)
+		return page
+
+	def get(self, page, codepoint):
+		"""
+		Return the cached glyph for this codepoint, or None if it isn't cached.
+		"""
+		entry = page.glyphs.get(codepoint)
+		if entry is None:
+			self.misses += 1
+			return None
+		self.hits += 1
+
+		# move it to the front of the list
+		head = self._head
+		if head[_NEXT] is not entry:
+			entry[_PREV][_NEXT] = entry[_NEXT]
+			entry[_NEXT][_PREV] = entry[_PREV]
+			entry[_PREV] = head
+			entry[_NEXT] = head[_NEXT]
+			head[_NEXT][_PREV] = entry
+			head[_NEXT] = entry
+		return entry[_GLYPH]
+
+	def put(self, page, codepoint, glyph, size):
+		"""
+		Store a glyph (of 'size' bytes) in the given page, dropping old glyphs if needed.
+		Glyphs larger than the whole cache are not stored.
+		"""
+		if size > self.max_bytes:
+			return
+		old = page.glyphs.get(codepoint)
+		if old is not None:
+			self._remove(old)
+		while self.bytes_used + size > self.max_bytes:
+			self._evict()
+
+		if not page.glyphs:
+			self._add_page(page)
+		head = self._head
+		entry = [head, head[_NEXT], page, codepoint, glyph, size]
+		head[_NEXT][_PREV] = entry
+		head[_NEXT] = entry
+		page.glyphs[codepoint] = entry
+		self.bytes_used += size
+
+	def _remove(self, entry):
+		"""Take a glyph out of the list and its page."""
+		entry[_PREV][_NEXT] = entry[_NEXT]
+		entry[_NEXT][_PREV] = entry[_PREV]
+		page = entry[_PAGE]
+		del page.glyphs[entry[_CODEPOINT]]
+		self.bytes_used -= entry[_SIZE]
+		if not page.glyphs:
+			self._drop_page(page)
+
+	def _evict(self):
+		"""Drop the least recently used glyph."""
+		entry = self._head[_PREV]
+		if entry is self._head:
+			# nothing left to drop
+			self.bytes_used = 0
+			return
+		self._remove(entry)
+
+	def _add_page(self, page):
+		"""Keep a page that is getting its first glyph."""
+		colors = self._fonts.get(page.font)
+		if colors is None:
+			colors = {}
+			self._fonts[page.font] = colors
+		bgs = colors.get(page.fg)
+		if bgs is None:
+			bgs = {}
+			colors[page.fg] = bgs
+		bgs[page.bg] = page
+
+	def _drop_page(self, page):
+		"""Forget an empty page, so unused color combinations don't pile up."""
+		colors = self._fonts.get(page.font)
+		if colors is None:
+			return
+		bgs = colors.get(page.fg)
+		# the page might already have been replaced by a new one with the same colors
+		if bgs is None or bgs.get(page.bg) is not page:
+			return
+		del bgs[page.bg]
+		if not bgs:
+			del colors[page.fg]
+			if not colors:
+				del self._fonts[page.font]
+
+	def clear(self):
+		"""Drop all cached glyphs, and reset the hit/miss counters."""
+		self._fonts = {}
+		self._head[_PREV] = self._head[_NEXT] = self._head
+		self.bytes_used = 0
+		self.hits = 0
+		self.misses = 0
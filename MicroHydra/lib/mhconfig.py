@@ -1,6 +1,6 @@
 
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ CONSTANT ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-DEFAULT_CONFIG = {"ui_color":53243, "bg_color":4421, "ui_sound":True, "volume":2, "wifi_ssid":'', "wifi_pass":'', 'sync_clock':True, 'timezone':0}
+DEFAULT_CONFIG = {"ui_color":53243, "bg_color":4421, "ui_sound":True, "volume":2, "wifi_ssid":'', "wifi_pass":'', 'sync_clock':True, 'timezone':0, 'boot_profile':False}
 
 def mix(val2, val1, fac=0.5):
 	"""Mix two values to the weight of fac"""
@@ -267,6 +267,23 @@ class Config:
 			color565_shiftgreen(mid_color), # green color
 			color565_shiftblue(darker_color565(mid_color)) # blue color
 			)
+		# palette converted for a display, see device_palette
+		self._device_palette = None
+		self._device_palette_tft = None
+	
+	def device_palette(self, tft):
+		"""
+		Get the palette as "device colors" for the given display, so drawing doesn't have to convert them.
+		The result is cached, and only made again for a new display, or a new palette.
+		Displays without device colors (like lib.st7789py) just get the normal palette.
+		"""
+		if self._device_palette is None or self._device_palette_tft is not tft:
+			if hasattr(tft, "device_color"):
+				self._device_palette = tuple(tft.device_color(color) for color in self.palette)
+			else:
+				self._device_palette = self.palette
+			self._device_palette_tft = tft
+		return self._device_palette
 		
 	def __getitem__(self, key):
 		# get item passthrough
@@ -0,0 +1,172 @@
+"""
+Streaming images for MicroHydra.
+
+Images are stored in a small binary ".mhi" file, which is decoded a few rows at a time,
+straight from flash or SD, so that a full screen image never has to be held in RAM.
+Use misc/image_converter.py to make .mhi files.
+
+File layout (all numbers are little-endian):
+	- header: b"MHI", version (1 byte), width (u16), height (u16), palette size (u16, at most 256)
+	- palette: one RGB565 color (u16) for each entry
+	- rows: for every row, the compressed length (u16) followed by the compressed row.
+	  Rows are one palette index per pixel, compressed with PackBits:
+	  a control byte n < 128 is followed by n + 1 literal bytes,
+	  and n >= 128 is followed by one byte that repeats n - 125 times.
+
+Example:
+	from lib.mhimage import Image
+	img = Image("/assets/testcard.mhi")
+	img.draw(tft, 0, 0)
+"""
+
+import struct
+import framebuf
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ CONSTANT ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+_MAGIC = b"MHI"
+_VERSION = const(1)
+_HEADER = const("<3sBHHH")
+_HEADER_SIZE = const(10)
+
+# rows decoded at once, more is a little faster but uses more RAM
+_BAND_ROWS = const(8)
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Decoding ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+@micropython.viper
+def _unpack_row(src, length: int, dst, start: int, width: int) -> int:
+	"""
+	Decompress one PackBits row into dst[start:start + width].
+	Returns the number of pixels written.
+	"""
+	s = ptr8(src)
+	d = ptr8(dst)
+	i = 0
+	out = start
+	end = start + width
+	while i < length and out < end:
+		count = s[i]
+		i += 1
+		if count < 128:
+			# literal run
+			count += 1
+			while count > 0 and out < end and i < length:
+				d[out] = s[i]
+				out += 1
+				i += 1
+				count -= 1
+		else:
+			# repeated byte
+			count -= 125
+			val = s[i]
+			i += 1
+			while count > 0 and out < end:
+				d[out] = val
+				out += 1
+				count -= 1
+	return out - start
+
+
+@micropython.viper
+def _expand(indices, palette, buffer, length: int):
+	"""Look up 'length' palette indexes, writing 2 byte colors to buffer."""
+	src = ptr8(indices)
+	lut = ptr16(palette)
+	dst = ptr16(buffer)
+	for i in range(length):
+		dst[i] = lut[src[i]]
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Image Class ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class Image:
+	def __init__(self, path):
+		"""
+		Open a .mhi image, and read its size and palette.
+		The file itself is only kept open while drawing.
+		params:
+			path:str
+				- The path to the .mhi file.
+		"""
+		self.path = path
+		with open(path, "rb") as f:
+			magic, version, self.width, self.height, num_colors = struct.unpack(_HEADER, f.read(_HEADER_SIZE))
+			if magic != _MAGIC or version != _VERSION:
+				raise ValueError(f"'{path}' is not a MicroHydra image.")
+			if num_colors > 256:
+				# pixels are 1 byte palette indexes
+				raise ValueError(f"'{path}' has {num_colors} colors, but images can only have 256.")
+			self.palette = struct.unpack(f"<{num_colors}H", f.read(num_colors * 2))
+		self._data_start = _HEADER_SIZE + num_colors * 2
+
+	def _encoded_palette(self, encoding):
+		"""Palette as 256 2-byte colors, packed with the given struct format."""
+		palette = bytearray(512)
+		for i, color in enumerate(self.palette):
+			struct.pack_into(encoding, palette, i * 2, color)
+		return palette
+
+	def rows(self, band_rows=_BAND_ROWS):
+		"""
+		Generator that decodes the image a few rows at a time.
+		Each step yields (first row, number of rows, indices), where indices is a reused bytearray
+		holding one palette index per pixel for those rows.
+		"""
+		width = self.width
+		height = self.height
+		indices = bytearray(width * band_rows)
+		# worst case for PackBits is one extra byte per 128
+		comp = bytearray(width + width // 128 + 2)
+		comp_mv = memoryview(comp)
+		length_buf = bytearray(2)
+
+		with open(self.path, "rb") as f:
+			f.seek(self._data_start)
+			for first_row in range(0, height, band_rows):
+				num_rows = min(band_rows, height - first_row)
+				for row in range(num_rows):
+					f.readinto(length_buf)
+					length = length_buf[0] | (length_buf[1] << 8)
+					if length > len(comp) or f.readinto(comp_mv[:length]) != length \
+					or _unpack_row(comp, length, indices, row * width, width) != width:
+						raise ValueError(f"'{self.path}' is damaged, at row {first_row + row}.")
+				yield first_row, num_rows, indices
+
+	def draw(self, tft, x=0, y=0, band_rows=_BAND_ROWS):
+		"""
+		Draw the image with its top left corner at (x, y).
+		With st7789fbuf, the image is clipped like any other drawing (see ST7789.push_clip).
+		params:
+			tft:ST7789
+				- An 'ST7789' object from lib.st7789py or lib.st7789fbuf
+			band_rows:int
+				- How many rows to decode at once.
+		"""
+		width = self.width
+		if hasattr(tft, "fbuf"):
+			# st7789fbuf: blit the indices using the palette, framebuf does the lookup.
+			# (encode_color also handles the driver's indexed mode)
+			palette = framebuf.FrameBuffer(bytearray(512), 256, 1, framebuf.RGB565)
+			for i, color in enumerate(self.palette):
+				palette.pixel(i, 0, tft.encode_color(color))
+			band = None
+			for first_row, num_rows, indices in self.rows(band_rows):
+				if band is None or num_rows != band_rows:
+					band = framebuf.FrameBuffer(indices, width, num_rows, framebuf.GS8)
+				tft.blit_framebuf(band, x, y + first_row, -1, palette, width, num_rows)
+			return
+
+		# st7789py: expand each band to colors and send it to the display right away
+		if x + width > tft.width:
+			return
+		palette = self._encoded_palette("<H" if tft.needs_swap else ">H")
+		buffer = bytearray(width * band_rows * 2)
+		buffer_mv = memoryview(buffer)
+		for first_row, num_rows, indices in self.rows(band_rows):
+			num_rows = min(num_rows, tft.height - y - first_row)
+			if num_rows <= 0:
+				break
+			_expand(indices, palette, buffer, width * num_rows)
+			tft.blit_buffer(buffer_mv[:width * num_rows * 2], x, y + first_row, width, num_rows)
@@ -153,7 +153,8 @@ class UI_Overlay:
 		
 if __name__ == "__main__":
 	# just for testing
-	reserved_bytearray = bytearray(240*135*2)
+	# one spare row, for clipping (see ST7789.push_clip)
+	reserved_bytearray = bytearray(240*136*2)
 	from lib import st7789fbuf, keyboard
 	from lib.mhconfig import Config
 	from machine import Pin, SPI
@@ -0,0 +1,127 @@
+"""
+A tiny boot profiler for MicroHydra.
+
+Named checkpoints record the time (time.ticks_us) and free memory (gc.mem_free),
+to show where boot time goes between main.py and the launcher's first frame.
+The last _MAX_CHECKPOINTS checkpoints are kept in a ring buffer, so nothing is allocated while recording.
+
+Profiling is turned on with the "boot_profile" config option.
+The launcher mirrors that option into a flag file, so that main.py can check it
+before anything else is loaded, without reading config.json.
+While profiling is off, checkpoint() does nothing.
+"""
+
+import time, gc, os, sys
+from array import array
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ CONSTANT ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+_FLAG_PATH = "/boot_profile"
+LOG_PATH = "/boot_profile.log"
+_MAX_CHECKPOINTS = const(24)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ State ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+enabled = False
+_names = None
+_ticks = None
+_mem = None
+# total number of checkpoints recorded (the ring buffer only keeps the last _MAX_CHECKPOINTS)
+_count = 0
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Functions ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def start():
+	"""
+	Start profiling, if it has been turned on (see set_enabled).
+	This should be called as early as possible during boot. (main.py does this)
+	"""
+	global enabled, _names, _ticks, _mem, _count
+	try:
+		open(_FLAG_PATH, "r").close()
+	except OSError:
+		return
+	enabled = True
+	_names = [None] * _MAX_CHECKPOINTS
+	_ticks = array('l', [0]) * _MAX_CHECKPOINTS
+	_mem = array('l', [0]) * _MAX_CHECKPOINTS
+	_count = 0
+	checkpoint("start")
+
+
+def checkpoint(name):
+	"""
+	Record the time and free memory, at the end of a boot phase.
+	params:
+		name:str
+			- A short name for the phase that just finished.
+	"""
+	global _count
+	if not enabled:
+		return
+	idx = _count % _MAX_CHECKPOINTS
+	# the time is read first, so gc.mem_free is counted in the next phase rather than this one
+	_ticks[idx] = time.ticks_us()
+	_mem[idx] = gc.mem_free()
+	_names[idx] = name
+	_count += 1
+
+
+def results():
+	"""
+	Get the recorded checkpoints, oldest first.
+	Returns a list of (name, us since the first checkpoint, us since the previous checkpoint, free memory)
+	"""
+	output = []
+	if not enabled:
+		return output
+	first = max(0, _count - _MAX_CHECKPOINTS)
+	start_ticks = prev_ticks = _ticks[first % _MAX_CHECKPOINTS]
+	for i in range(first, _count):
+		idx = i % _MAX_CHECKPOINTS
+		ticks = _ticks[idx]
+		output.append((
+			_names[idx],
+			time.ticks_diff(ticks, start_ticks),
+			time.ticks_diff(ticks, prev_ticks),
+			_mem[idx],
+		))
+		prev_ticks = ticks
+	return output
+
+
+def dump(path=None):
+	"""
+	Print the recorded checkpoints to the serial console, or append them to a file.
+	params:
+		path:str
+			- A file to append to, such as LOG_PATH. (by default, the checkpoints are printed)
+	"""
+	lines = [f"~~~ boot profile ({sys.version}) ~~~"]
+	lines.append(f"{'phase':<20}{'total us':>10}{'phase us':>10}{'mem free':>10}")
+	for name, total, phase, mem_free in results():
+		lines.append(f"{name:<20}{total:>10}{phase:>10}{mem_free:>10}")
+
+	if path is None:
+		for line in lines:
+			print(line)
+		return
+	try:
+		with open(path, "a") as log:
+			for line in lines:
+				log.write(line + "\n")
+	except OSError as e:
+		print(f"Couldn't write boot profile to {path}: {e}")
+
+
+def set_enabled(value):
+	"""
+	Turn boot profiling on or off, starting from the next boot.
+	params:
+		value:bool
+	"""
+	if value:
+		with open(_FLAG_PATH, "w") as flag:
+			flag.write("1")
+	else:
+		try:
+			os.remove(_FLAG_PATH)
+		except OSError:
+			pass
@@ -0,0 +1,385 @@
+"""
+Sprites and tile maps for lib.st7789fbuf.
+
+A SpriteSheet holds many same-sized images in one buffer.
+A TileMap is a (scrollable) grid of sprite indexes, stored in a bytearray.
+A Scene draws a TileMap and any number of Sprites to the display,
+and only redraws the areas that changed since the last frame,
+so moving sprites don't have to be erased by hand.
+
+Example:
+	sheet = SpriteSheet.from_image(tft, "/assets/sprites.mhi", 16, 16)
+	tiles = TileMap(sheet, 30, 9)
+	player = Sprite(sheet, 3, x=40, y=60, key=st7789.BLACK)
+	scene = Scene(tft, tiles)
+	scene.add(player)
+	while True:
+		player.move_by(1, 0)
+		scene.draw()
+		tft.show()
+"""
+
+import framebuf
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ CONSTANT ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# tile index for an empty map cell (filled with the scene's background color)
+EMPTY = const(255)
+
+# more separate areas than this are merged into one
+_MAX_DIRTY_RECTS = const(8)
+
+
+
+def _add_rect(rects, x0, y0, x1, y1):
+	"""Add an area (end exclusive) to a list of areas, growing an existing one if they touch."""
+	for rect in rects:
+		if x0 <= rect[2] and rect[0] <= x1 and y0 <= rect[3] and rect[1] <= y1:
+			rect[0] = min(rect[0], x0)
+			rect[1] = min(rect[1], y0)
+			rect[2] = max(rect[2], x1)
+			rect[3] = max(rect[3], y1)
+			return
+	rects.append([x0, y0, x1, y1])
+
+	if len(rects) > _MAX_DIRTY_RECTS:
+		rect = rects[0]
+		for other in rects:
+			rect[0] = min(rect[0], other[0])
+			rect[1] = min(rect[1], other[1])
+			rect[2] = max(rect[2], other[2])
+			rect[3] = max(rect[3], other[3])
+		rects.clear()
+		rects.append(rect)
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ SpriteSheet Class ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class SpriteSheet:
+	def __init__(self, width, height, sprite_width, sprite_height, format=framebuf.RGB565):
+		"""
+		Create an empty sprite sheet (atlas). Draw into it using self.fbuf,
+		with colors from ST7789.encode_color(), or load one with from_image().
+		Sprites are numbered left to right, top to bottom.
+		params:
+			width:int
+			height:int
+				- Size of the whole sheet, in pixels.
+			sprite_width:int
+			sprite_height:int
+				- Size of each sprite (and map tile).
+			format:int
+				- framebuf.RGB565, or framebuf.GS8 for a display in indexed mode.
+		"""
+		if format == framebuf.RGB565:
+			self._pixel_bytes = 2
+		elif format == framebuf.GS8:
+			self._pixel_bytes = 1
+		else:
+			raise ValueError("SpriteSheet format must be RGB565 or GS8.")
+
+		self.width = width
+		self.height = height
+		self.sprite_width = sprite_width
+		self.sprite_height = sprite_height
+		self.format = format
+		# framebuf checks that a whole stride is available for every row,
+		# one spare row lets sprites on the bottom of the sheet be cropped.
+		self.buffer = bytearray(width * (height + 1) * self._pixel_bytes)
+		self._mv = memoryview(self.buffer)
+		self.fbuf = framebuf.FrameBuffer(self.buffer, width, height, format)
+
+		# blittable (buffer, width, height, format, stride) for every sprite
+		self.sprites = []
+		for y in range(0, height - sprite_height + 1, sprite_height):
+			for x in range(0, width - sprite_width + 1, sprite_width):
+				self.sprites.append(self._region(x, y, sprite_width, sprite_height))
+
+	@classmethod
+	def from_image(cls, tft, path, sprite_width, sprite_height, format=framebuf.RGB565):
+		"""
+		Load a sprite sheet from a .mhi image (see lib.mhimage).
+		params:
+			tft:ST7789
+				- The lib.st7789fbuf display the sprites will be drawn to. (used for encoding colors)
+		"""
+		from lib.mhimage import Image
+		img = Image(path)
+		sheet = cls(img.width, img.height, sprite_width, sprite_height, format)
+
+		palette = framebuf.FrameBuffer(bytearray(512), 256, 1, framebuf.RGB565)
+		for i, color in enumerate(img.palette):
+			palette.pixel(i, 0, tft.encode_color(color))
+		for first_row, num_rows, indices in img.rows():
+			sheet.fbuf.blit((indices, img.width, num_rows, framebuf.GS8), 0, first_row, -1, palette)
+		return sheet
+
+	def _region(self, x, y, width, height):
+		"""Get a blittable tuple for one area of the sheet."""
+		start = ((y * self.width) + x) * self._pixel_bytes
+		return (self._mv[start:], width, height, self.format, self.width)
+
+	def crop(self, index, x, y, width, height):
+		"""Get a blittable tuple for part of one sprite. (x, y are relative to the sprite)"""
+		per_row = self.width // self.sprite_width
+		return self._region(
+			(index % per_row) * self.sprite_width + x,
+			(index // per_row) * self.sprite_height + y,
+			width,
+			height,
+			)
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Sprite Class ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class Sprite:
+	def __init__(self, sheet, index, x=0, y=0, key=-1):
+		"""
+		A movable image from a sprite sheet.
+		Change it using the methods below, so that the Scene knows to redraw it.
+		params:
+			sheet:SpriteSheet
+			index:int
+				- Which sprite in the sheet to show.
+			x:int
+			y:int
+				- Position of the top left corner on the display.
+			key:int
+				- 565 color to treat as transparent, or -1 for none.
+		"""
+		self.sheet = sheet
+		self.index = index
+		self.x = x
+		self.y = y
+		self.key = key
+		self.visible = True
+		self.width = sheet.sprite_width
+		self.height = sheet.sprite_height
+		self.changed = True
+		# (x, y) where it was last drawn, or None
+		self._drawn = None
+
+	def move(self, x, y):
+		"""Move to the given position."""
+		if x != self.x or y != self.y:
+			self.x = x
+			self.y = y
+			self.changed = True
+
+	def move_by(self, x, y):
+		"""Move by the given amount."""
+		self.move(self.x + x, self.y + y)
+
+	def set_index(self, index):
+		"""Show a different sprite from the sheet (for animation)."""
+		if index != self.index:
+			self.index = index
+			self.changed = True
+
+	def show(self, visible=True):
+		"""Show or hide the sprite."""
+		if visible != self.visible:
+			self.visible = visible
+			self.changed = True
+
+	def collides(self, other):
+		"""Check if this sprite's rectangle overlaps another sprite's."""
+		return (
+			self.x < other.x + other.width
+			and other.x < self.x + self.width
+			and self.y < other.y + other.height
+			and other.y < self.y + self.height
+			)
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ TileMap Class ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class TileMap:
+	def __init__(self, sheet, cols, rows, tiles=None):
+		"""
+		A grid of tiles from a sprite sheet, drawn behind all sprites.
+		params:
+			sheet:SpriteSheet
+			cols:int
+			rows:int
+				- Size of the map, in tiles. It can be larger than the display, and scrolled.
+			tiles:bytearray
+				- One sprite index per tile, row by row. EMPTY tiles show the background color.
+				  By default, all tiles are EMPTY.
+		"""
+		self.sheet = sheet
+		self.cols = cols
+		self.rows = rows
+		self.tiles = tiles if tiles is not None else bytearray([EMPTY]) * (cols * rows)
+		# scroll position, in pixels
+		self.x = 0
+		self.y = 0
+		self.scrolled = True
+		# (col, row) of tiles changed since the last draw
+		self.changed = []
+
+	def get(self, col, row):
+		"""Get the sprite index at a map position."""
+		return self.tiles[(row * self.cols) + col]
+
+	def set(self, col, row, index):
+		"""Change the sprite index at a map position."""
+		pos = (row * self.cols) + col
+		if self.tiles[pos] != index:
+			self.tiles[pos] = index
+			self.changed.append((col, row))
+
+	def scroll_to(self, x, y):
+		"""Scroll the map, so that (x, y) on the map is at the top left of the display."""
+		if x != self.x or y != self.y:
+			self.x = x
+			self.y = y
+			self.scrolled = True
+
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Scene Class ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class Scene:
+	def __init__(self, tft, tilemap=None, bg_color=0):
+		"""
+		Draws a tile map and sprites, redrawing only what changed.
+		params:
+			tft:ST7789
+				- An 'ST7789' object from lib.st7789fbuf
+			tilemap:TileMap
+				- Optional background map.
+			bg_color:int
+				- 565 color shown where there are no tiles.
+		"""
+		self.tft = tft
+		self.tilemap = tilemap
+		self.bg_color = bg_color
+		self.sprites = []
+		self._dirty = []
+		self._redraw_all = True
+
+	def add(self, sprite):
+		"""Add a sprite, drawn on top of the sprites already added."""
+		self.sprites.append(sprite)
+		sprite.changed = True
+
+	def remove(self, sprite):
+		"""Remove a sprite, erasing it on the next draw."""
+		self.sprites.remove(sprite)
+		if sprite._drawn is not None:
+			x, y = sprite._drawn
+			_add_rect(self._dirty, x, y, x + sprite.width, y + sprite.height)
+			sprite._drawn = None
+
+	def redraw(self):
+		"""Redraw everything on the next draw(). (For example, after drawing over the scene.)"""
+		self._redraw_all = True
+
+	def draw(self):
+		"""
+		Redraw the areas that changed since the last call, and mark them for tft.show().
+		Everything is drawn with tft.blit_framebuf() and tft.fill_rect(),
+		so while a clip is set on tft (see ST7789.push_clip), only the part inside it is drawn.
+		Call redraw() after removing the clip, to bring the rest up to date.
+		"""
+		tft = self.tft
+		dirty = self._dirty
+		tilemap = self.tilemap
+
+		if tilemap is not None:
+			if tilemap.scrolled:
+				self._redraw_all = True
+			else:
+				tile_width = tilemap.sheet.sprite_width
+				tile_height = tilemap.sheet.sprite_height
+				for col, row in tilemap.changed:
+					x = (col * tile_width) - tilemap.x
+					y = (row * tile_height) - tilemap.y
+					_add_rect(dirty, x, y, x + tile_width, y + tile_height)
+			tilemap.scrolled = False
+			tilemap.changed.clear()
+
+		for sprite in self.sprites:
+			if sprite.changed:
+				if sprite._drawn is not None:
+					x, y = sprite._drawn
+					_add_rect(dirty, x, y, x + sprite.width, y + sprite.height)
+				if sprite.visible:
+					_add_rect(dirty, sprite.x, sprite.y, sprite.x + sprite.width, sprite.y + sprite.height)
+					sprite._drawn = (sprite.x, sprite.y)
+				else:
+					sprite._drawn = None
+				sprite.changed = False
+
+		if self._redraw_all:
+			dirty.clear()
+			dirty.append([0, 0, tft.width, tft.height])
+			self._redraw_all = False
+
+		for x0, y0, x1, y1 in dirty:
+			# clamp to the display
+			x0 = max(x0, 0)
+			y0 = max(y0, 0)
+			x1 = min(x1, tft.width)
+			y1 = min(y1, tft.height)
+			if x0 < x1 and y0 < y1:
+				self._draw_area(x0, y0, x1, y1)
+		dirty.clear()
+
+	@staticmethod
+	def _blit(tft, sheet, index, x, y, key, x0, y0, x1, y1):
+		"""Blit one sprite from a sheet at (x, y), cropped to the area x0, y0, x1, y1."""
+		width = sheet.sprite_width
+		height = sheet.sprite_height
+		crop_x0 = max(x, x0)
+		crop_y0 = max(y, y0)
+		crop_x1 = min(x + width, x1)
+		crop_y1 = min(y + height, y1)
+		if crop_x0 >= crop_x1 or crop_y0 >= crop_y1:
+			return
+
+		if crop_x0 == x and crop_y0 == y and crop_x1 == x + width and crop_y1 == y + height:
+			source = sheet.sprites[index]
+		else:
+			source = sheet.crop(index, crop_x0 - x, crop_y0 - y, crop_x1 - crop_x0, crop_y1 - crop_y0)
+		tft.blit_framebuf(source, crop_x0, crop_y0, key, width=crop_x1 - crop_x0, height=crop_y1 - crop_y0)
+
+	def _draw_area(self, x0, y0, x1, y1):
+		"""Draw the tiles and sprites in one area of the display."""
+		tft = self.tft
+		tilemap = self.tilemap
+		bg_color = self.bg_color
+
+		if tilemap is None:
+			tft.fill_rect(x0, y0, x1 - x0, y1 - y0, bg_color)
+		else:
+			sheet = tilemap.sheet
+			tiles = tilemap.tiles
+			tile_width = sheet.sprite_width
+			tile_height = sheet.sprite_height
+			for row in range((y0 + tilemap.y) // tile_height, (y1 - 1 + tilemap.y) // tile_height + 1):
+				y = (row * tile_height) - tilemap.y
+				for col in range((x0 + tilemap.x) // tile_width, (x1 - 1 + tilemap.x) // tile_width + 1):
+					x = (col * tile_width) - tilemap.x
+					if 0 <= row < tilemap.rows and 0 <= col < tilemap.cols:
+						index = tiles[(row * tilemap.cols) + col]
+					else:
+						index = EMPTY
+					if index == EMPTY:
+						# background, cropped to the area
+						fill_x0 = max(x, x0)
+						fill_y0 = max(y, y0)
+						tft.fill_rect(
+							fill_x0, fill_y0,
+							min(x + tile_width, x1) - fill_x0, min(y + tile_height, y1) - fill_y0,
+							bg_color
+							)
+					else:
+						self._blit(tft, sheet, index, x, y, -1, x0, y0, x1, y1)
+
+		for sprite in self.sprites:
+			if sprite.visible:
+				key = sprite.key
+				if key != -1:
+					key = tft.encode_color(key)
+				self._blit(tft, sprite.sheet, sprite.index, sprite.x, sprite.y, key, x0, y0, x1, y1)
@@ -0,0 +1,245 @@
+"""
+A non-blocking WiFi connection (and clock sync) for MicroHydra apps.
+
+WiFi takes a while to connect, and apps shouldn't freeze while it does.
+WiFi.update() does a little bit of the work each time it's called, so it can be called from an app's main loop.
+Failed connections (and clock syncs) are retried, waiting longer after each failure.
+
+Example:
+	wifi = WiFi(sync_time=True)
+	wifi.connect(config["wifi_ssid"], config["wifi_pass"])
+	while True:
+		if wifi.update() == CONNECTED:
+			...
+"""
+
+import time
+from machine import RTC
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ CONSTANT ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+# statuses:
+IDLE = const(0)
+CONNECTING = const(1)
+SYNCING = const(2) # connected, and setting the clock
+CONNECTED = const(3)
+DONE = const(4) # the clock was synced, and wifi was turned off again
+FAILED = const(5)
+
+_STATUS_TEXT = ("idle", "connecting", "syncing clock", "connected", "done", "failed")
+
+_RETRY_MS = const(1000) # wait after the first failure, doubled after each failure after that
+_MAX_RETRY_MS = const(8000)
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ WiFi Class ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+class WiFi:
+	def __init__(self, sync_time=False, timezone=0, keep_connected=True, timeout_ms=10000, max_attempts=3, max_sync_attempts=10):
+		"""
+		Manage the WiFi connection, without blocking.
+		The WLAN object is made right away, because it needs a lot of memory.
+		params:
+			sync_time:bool
+				- Set the clock with NTP once connected.
+			timezone:int
+				- Hours to add to the (UTC) time from NTP.
+			keep_connected:bool
+				- If False, WiFi is turned off again after the clock is synced (status becomes DONE).
+			timeout_ms:int
+				- How long to wait for each connection attempt.
+			max_attempts:int
+			max_sync_attempts:int
+				- How many times to try connecting / syncing the clock, before giving up.
+		"""
+		self.sync_time = sync_time
+		self.timezone = timezone
+		self.keep_connected = keep_connected
+		self.timeout_ms = timeout_ms
+		self.max_attempts = max_attempts
+		self.max_sync_attempts = max_sync_attempts
+
+		self.status = IDLE
+		# the reason for the last failure, if any
+		self.error = None
+		self.synced = False
+
+		self.ssid = None
+		self.password = None
+		self.nic = None
+		self._attempts = 0
+		# a connection attempt (or a retry) is due at this time
+		self._deadline = 0
+		self._waiting = False
+		self._init_nic()
+
+	def _init_nic(self):
+		"""Make the WLAN object. wifi loves to give unknown runtime errors, so just try it twice."""
+		import network
+		try:
+			self.nic = network.WLAN(network.STA_IF)
+		except RuntimeError as e:
+			print(e)
+			try:
+				self.nic = network.WLAN(network.STA_IF)
+			except RuntimeError as e:
+				print("Wifi WLAN object couldnt be created. Gave this error:",e)
+				self._fail("couldn't set up WLAN")
+
+	def status_text(self):
+		"""Describe the current status (or error), for showing to the user."""
+		if self.status == FAILED and self.error:
+			return f"failed: {self.error}"
+		return _STATUS_TEXT[self.status]
+
+	def is_connected(self):
+		return self.status == CONNECTED or self.status == SYNCING
+
+	def connect(self, ssid, password):
+		"""
+		Start connecting. This returns right away, call update() to keep the connection going.
+		params:
+			ssid:str
+			password:str
+		"""
+		self.ssid = ssid
+		self.password = password
+		self.error = None
+		if not ssid:
+			self._fail("wifi information not found in config")
+			return
+		if self.nic is None:
+			self._init_nic()
+			if self.nic is None:
+				return
+
+		if not self.nic.active(): # turn on wifi if it isn't already
+			self.nic.active(True)
+		self._attempts = 0
+		self._start_attempt()
+
+	def disconnect(self):
+		"""Disconnect, and turn off WiFi to save power."""
+		if self.nic is not None:
+			try:
+				self.nic.disconnect()
+				self.nic.active(False)
+			except OSError as e:
+				print(e)
+		self.status = IDLE
+
+	def update(self):
+		"""
+		Move the connection along. This never waits for the network.
+		Call this regularly, for example once per loop.
+		Returns the current status.
+		"""
+		status = self.status
+		if status == IDLE or status == DONE or status == FAILED:
+			return status
+
+		now = time.ticks_ms()
+		if self._waiting:
+			# waiting to retry
+			if time.ticks_diff(self._deadline, now) > 0:
+				return status
+			self._waiting = False
+			if status == CONNECTING:
+				self._start_attempt()
+				return self.status
+
+		if status == CONNECTING:
+			if self.nic.isconnected():
+				self._on_connected()
+			elif time.ticks_diff(now, self._deadline) >= 0:
+				print("Wifi connection timed out")
+				self._retry(self.max_attempts, "couldn't connect")
+
+		elif not self.nic.isconnected():
+			# connection lost, start over
+			self._attempts = 0
+			self._start_attempt()
+
+		elif status == SYNCING:
+			self._sync()
+
+		return self.status
+
+	def _start_attempt(self):
+		"""Start one connection attempt."""
+		self.status = CONNECTING
+		if self.nic.isconnected():
+			self._on_connected()
+			return
+		try:
+			self.nic.connect(self.ssid, self.password)
+		except OSError as e:
+			print("Wifi had this error when connecting:", e)
+			self._retry(self.max_attempts, "couldn't connect")
+			return
+		self._deadline = time.ticks_add(time.ticks_ms(), self.timeout_ms)
+
+	def _on_connected(self):
+		self._attempts = 0
+		if self.sync_time and not self.synced:
+			self.status = SYNCING
+		else:
+			self.status = CONNECTED
+
+	def _sync(self):
+		"""Try to set the clock with NTP once. (ntptime waits up to a second for a reply)"""
+		import ntptime
+		try:
+			ntptime.settime()
+		except (OSError, OverflowError) as e:
+			print("NTP sync had this error:", e)
+			if not self._retry(self.max_sync_attempts, "couldn't sync clock"):
+				# the connection itself is fine
+				self._finish()
+			return
+
+		self.synced = True
+		if self.timezone:
+			# apply our timezone offset
+			year, month, day, hour, minute, second, weekday, _ = time.localtime(time.time() + self.timezone * 3600)
+			RTC().datetime((year, month, day, weekday, hour, minute, second, 0))
+		print(f"RTC successfully synced to {RTC().datetime()} with {self._attempts + 1} attempts.")
+		self._finish()
+
+	def _finish(self):
+		"""The clock sync is finished (or has given up)."""
+		self._attempts = 0
+		if self.keep_connected:
+			self.status = CONNECTED
+		else:
+			self.disconnect()
+			self.status = DONE
+
+	def _retry(self, max_attempts, error):
+		"""
+		Schedule another try after a failure, waiting longer each time.
+		Returns False (and sets the error) once max_attempts is reached.
+		"""
+		self._attempts += 1
+		if self._attempts >= max_attempts:
+			self.error = error
+			if self.status == CONNECTING:
+				self._fail(error)
+			return False
+		if self.status == CONNECTING:
+			# stop the attempt that failed, before starting the next one
+			try:
+				self.nic.disconnect()
+			except OSError:
+				pass
+		self._waiting = True
+		self._deadline = time.ticks_add(time.ticks_ms(), min(_RETRY_MS << (self._attempts - 1), _MAX_RETRY_MS))
+		return True
+
+	def _fail(self, error):
+		print(f"Wifi failed: {error}")
+		self.error = error
+		if self.nic is not None:
+			try:
+				self.nic.disconnect()
+				self.nic.active(False) #shut off wifi
+			except OSError:
+				pass
+		self.status = FAILED
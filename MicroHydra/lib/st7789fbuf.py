@@ -45,6 +45,8 @@ This driver supports:
   BIOS text mode fonts.
 - Drawing text using converted TrueType fonts.
 - Drawing converted bitmaps
+- An optional 8 bit indexed color framebuffer, using half the memory
+- Drawing at a lower resolution, stretched to fill the display
 - Named color constants
 
   - BLACK
@@ -155,6 +157,25 @@ _BIT2 = const(0x04)
 _BIT1 = const(0x02)
 _BIT0 = const(0x01)
 
+# dirty region tracking for show()
+_MAX_DIRTY_RECTS = const(8)
+# send the whole framebuf if this percentage of the display has changed
+_FULL_FLUSH_PCT = const(60)
+# larger than any supported display, used to mark "everything from here on"
+_MAX_DIM = const(0xffff)
+# rows sent per flush_step() when double buffered
+_FLUSH_BAND_ROWS = const(16)
+# fixed point math for transform_points
+_FIXED_SHIFT = const(14)
+_FIXED_ONE = const(16384)
+_SIN_TABLE = None
+# indexed color mode: rows expanded to RGB565 per SPI write in show()
+_EXPAND_ROWS = const(4)
+# FrameBuffer wrappers kept for recent blit_buffer() sources (registered buffers don't count)
+_MAX_BLIT_WRAPPERS = const(4)
+# marks a color that is already encoded for the framebuf (see device_color)
+_DEVICE_COLOR = const(0x10000)
+
 # fmt: off
 
 # Rotation tables
@@ -264,6 +285,80 @@ def rotate_points(points, angle=0, center_x=0, center_y=0):
 	else:
 		return points
 
+def _sin_table():
+	"""
+	Get the quarter-wave sine table used by transform_points, building it the first time.
+	sin(i * pi/2 / 256) * 16384, for i in 0..256
+	"""
+	global _SIN_TABLE
+	if _SIN_TABLE is None:
+		_SIN_TABLE = array.array('h', [round(sin(i * pi / 512) * _FIXED_ONE) for i in range(257)])
+	return _SIN_TABLE
+
+def _fixed_sin(step):
+	"""Fixed point (x16384) sine of an angle, given in 1024ths of a turn."""
+	table = _sin_table()
+	step &= 1023
+	idx = step & 255
+	if step < 256:
+		return table[idx]
+	if step < 512:
+		return table[256 - idx]
+	if step < 768:
+		return -table[idx]
+	return -table[256 - idx]
+
+@micropython.viper
+def _transform(src, dst, length: int, m00: int, m01: int, m10: int, m11: int, tx: int, ty: int):
+	"""
+	Apply a fixed point (x16384) 2x3 matrix to 'length' values (length/2 points) of an array('h').
+	Results are rounded down, like the float functions above. src and dst can be the same array.
+	"""
+	s = ptr16(src)
+	d = ptr16(dst)
+	for i in range(0, length, 2):
+		px = s[i]
+		py = s[i + 1]
+		# ptr16 is unsigned
+		if px & 0x8000:
+			px -= 0x10000
+		if py & 0x8000:
+			py -= 0x10000
+		d[i] = ((m00 * px) + (m01 * py) + tx) >> _FIXED_SHIFT
+		d[i + 1] = ((m10 * px) + (m11 * py) + ty) >> _FIXED_SHIFT
+
+def transform_points(points, out, angle=0, scale=1, center_x=0, center_y=0):
+	"""
+	Scale, then rotate (around center_x, center_y) all the points in one pass,
+	using fixed point math and a sine lookup table. Returns None.
+	
+	Nothing is allocated, so this is good for animations.
+	Rotation is accurate to 1/1024 of a turn.
+	
+	Args:
+		points (array('h')): flat array of x, y values
+		out (array('h')): where to put the result, at least as long as points. (can be points itself)
+		angle (float): rotation in radians
+		scale (float): scale factor
+		center_x (int): rotation center x (after scaling)
+		center_y (int): rotation center y (after scaling)
+	"""
+	step = round(angle * 512 / pi)
+	sin_a = _fixed_sin(step)
+	cos_a = _fixed_sin(step + 256)
+	# out = R * (scale * p - center) + center
+	fixed_scale = round(scale * _FIXED_ONE)
+	m00 = (cos_a * fixed_scale) >> _FIXED_SHIFT
+	m01 = -(sin_a * fixed_scale) >> _FIXED_SHIFT
+	m10 = (sin_a * fixed_scale) >> _FIXED_SHIFT
+	m11 = m00
+	tx = (center_x << _FIXED_SHIFT) - (cos_a * center_x) + (sin_a * center_y)
+	ty = (center_y << _FIXED_SHIFT) - (sin_a * center_x) - (cos_a * center_y)
+	if len(out) < len(points):
+		# _transform doesn't check, it would write past the end of out
+		raise ValueError(f"out holds {len(out)} values, but there are {len(points)} points.")
+	_transform(points, out, len(points), m00, m01, m10, m11, tx, ty)
+
 def warp_points(points, tilt_center=0.5, ease=True, focus_center_x=True, smallest=None, largest=None):
 	"""
 	Skew points on the y axis. Can create a faux 3d looking effect, or a kinda jelly-like effect.
@@ -338,6 +433,25 @@ def warp_points(points, tilt_center=0.5, ease=True, focus_center_x=True, smalles
 			
 	return points
 
+def _poly_bounds(points):
+	"""
+	Return the bounding box (min_x, min_y, max_x, max_y) of a flat array of points.
+	"""
+	min_x = max_x = points[0]
+	min_y = max_y = points[1]
+	for i in range(2, len(points), 2):
+		px = points[i]
+		py = points[i + 1]
+		if px < min_x:
+			min_x = px
+		elif px > max_x:
+			max_x = px
+		if py < min_y:
+			min_y = py
+		elif py > max_y:
+			max_y = py
+	return min_x, min_y, max_x, max_y
+
 def mix(val2, val1, fac=0.5):
 	"""Mix two values to the weight of fac"""
 	output = (val1 * fac) + (val2 * (1.0 - fac))
@@ -385,7 +499,19 @@ class ST7789:
 
 		  - ((width, height, xstart, ystart, madctl, needs_swap), ...)
 		  
-		reserved_bytearray (bytearray): pre-allocated bytearray to use for framebuffer
+		reserved_bytearray (bytearray): pre-allocated bytearray to use for framebuffer.
+			Making it one row bigger than the display lets push_clip() clip on all sides.
+		
+		double_buffer (bool): allocate a second framebuffer, so that show_async() can send
+			one frame while the next is being drawn. (This doubles the memory used!)
+		
+		indexed (bool): use a GS8 framebuffer with a 256 color palette, instead of RGB565.
+			This halves the memory used by the framebuffer. Colors are still given as 565 colors,
+			and are added to the palette the first time they're used. (see set_palette)
+		
+		scale (int): draw at a lower resolution, and stretch the image to fill the display in show().
+			For example, with scale=2 a 240x135 display has a 120x68 framebuffer,
+			using a quarter of the memory. self.width and self.height give the scaled size.
 
 	"""
 
@@ -402,7 +528,10 @@ class ST7789:
 		color_order=BGR,
 		custom_init=None,
 		custom_rotations=None,
-		reserved_bytearray = None
+		reserved_bytearray = None,
+		double_buffer = False,
+		indexed = False,
+		scale = 1
 	):
 		"""
 		Initialize display.
@@ -419,14 +548,88 @@ class ST7789:
 		if dc is None:
 			raise ValueError("dc pin is required.")
 		
+		if scale < 1:
+			raise ValueError("scale must be 1 or more.")
+		self._scale = scale
+		
 		#init the fbuf
+		if indexed:
+			self._format = framebuf.GS8
+			self._pixel_bytes = 1
+		else:
+			self._format = framebuf.RGB565
+			self._pixel_bytes = 2
+		
+		# size of the framebuf
+		fbuf_width = (width + scale - 1) // scale
+		fbuf_height = (height + scale - 1) // scale
+		
 		if reserved_bytearray == None:
-			reserved_bytearray = bytearray(height*width*2)
+			# one spare row, so that clip views touching the bottom edge fit (see push_clip)
+			reserved_bytearray = bytearray((fbuf_height*fbuf_width + max(fbuf_width, fbuf_height))*self._pixel_bytes)
 			
 		if rotation == 1 or rotation == 3:
-			self.fbuf = framebuf.FrameBuffer(reserved_bytearray, height, width, framebuf.RGB565)
+			self.fbuf = framebuf.FrameBuffer(reserved_bytearray, fbuf_height, fbuf_width, self._format)
+			self._stride = fbuf_height * self._pixel_bytes
 		else:
-			self.fbuf = framebuf.FrameBuffer(reserved_bytearray, width, height, framebuf.RGB565)
+			self.fbuf = framebuf.FrameBuffer(reserved_bytearray, fbuf_width, fbuf_height, self._format)
+			self._stride = fbuf_width * self._pixel_bytes
+		
+		# memoryview lets show() send parts of the buffer without copying them
+		self._fbuf_mv = memoryview(reserved_bytearray)
+		# list of [x0, y0, x1, y1] (end exclusive) areas that have changed since the last show()
+		self.dirty = []
+		# clipping (see push_clip): drawing goes to _target, which is self.fbuf,
+		# or a FrameBuffer view of the clip area, placed at (_view_x0, _view_y0).
+		# the clip is the whole display when not clipping.
+		self._target = self.fbuf
+		self._clip_stack = []
+		self._clip_x0 = self._clip_y0 = self._clip_x1 = self._clip_y1 = 0
+		self._view_x0 = self._view_y0 = 0
+		
+		# bitmap fonts are blitted straight from the font data, using a 2 color palette.
+		# {font: [glyph, ...]}, glyph = (memoryview, width, height, MONO_HLSB)
+		self._font_glyphs = {}
+		self._text_palette = framebuf.FrameBuffer(bytearray(4), 2, 1, framebuf.RGB565)
+		# converted true-type fonts for write(), {font: info} (see _write_font)
+		self._write_fonts = {}
+		# reused by polygon() for transformed points, {length: array('h')}
+		self._poly_scratch = {}
+		# converted bitmaps, ready for FrameBuffer.blit (see _bitmap_source and _bitmap_palette)
+		self._bitmap_sources = {}
+		self._bitmap_palettes = {}
+		# FrameBuffer wrappers for blit_buffer(), {id(buffer): (buffer, width, height, FrameBuffer)}
+		# the buffer is kept in the entry, so that its id can't be reused while the wrapper exists.
+		self._registered_buffers = {}
+		self._blit_wrappers = {}
+		
+		# indexed color mode: the palette, stored as the display expects it (big-endian RGB565),
+		# {565 color: palette index}, and a buffer for expanding rows in show()
+		self._lut = None
+		self._color_index = {}
+		self._palette_len = 0
+		self._line_mv = None
+		if indexed:
+			self._lut = bytearray(512)
+		if scale > 1:
+			# one scaled row, repeated 'scale' times
+			self._line_mv = memoryview(bytearray(max(width, height) * 2 * scale))
+		elif indexed:
+			self._line_mv = memoryview(bytearray(self._stride * 2 * _EXPAND_ROWS))
+		
+		# double buffering: self.fbuf is always the one being drawn to,
+		# and the "front" buffer is the one being sent to the display.
+		self._front_fbuf = None
+		self._front_mv = None
+		self._front_dirty = []
+		self._flush = None
+		if double_buffer:
+			front_bytearray = bytearray(len(reserved_bytearray))
+			if rotation == 1 or rotation == 3:
+				self._front_fbuf = framebuf.FrameBuffer(front_bytearray, fbuf_height, fbuf_width, self._format)
+			else:
+				self._front_fbuf = framebuf.FrameBuffer(front_bytearray, fbuf_width, fbuf_height, self._format)
+			self._front_mv = memoryview(front_bytearray)
 		
 		self.physical_width = self.width = width
 		self.physical_height = self.height = height
@@ -548,12 +751,20 @@ class ST7789:
 		self._rotation = rotation
 		(
 			madctl,
-			self.width,
-			self.height,
+			self._display_width,
+			self._display_height,
 			self.xstart,
 			self.ystart,
 			self.needs_swap,
 		) = self.rotations[rotation]
+		# drawing happens at the scaled size
+		self.width = (self._display_width + self._scale - 1) // self._scale
+		self.height = (self._display_height + self._scale - 1) // self._scale
+		# cached bitmap palettes depend on needs_swap
+		self._bitmap_palettes = {}
+		# any clip is for the old size
+		self._clip_stack = []
+		self._set_clip(0, 0, self.width, self.height)
 
 		if self.color_order == BGR:
 			madctl |= _ST7789_MADCTL_BGR
@@ -572,7 +783,7 @@ class ST7789:
 			x1 (int): column end address
 			y1 (int): row end address
 		"""
-		if x0 <= x1 <= self.width and y0 <= y1 <= self.height:
+		if x0 <= x1 <= self._display_width and y0 <= y1 <= self._display_height:
 			self._write(
 				_ST7789_CASET,
 				struct.pack(_ENCODE_POS, x0 + self.xstart, x1 + self.xstart),
@@ -593,9 +804,12 @@ class ST7789:
 			length (int): length of line
 			color (int): 565 encoded color
 		"""
-		if self.needs_swap:
-			color = swap_bytes(color)
-		self.fbuf.vline(x, y, length, color)
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		if x < self._clip_x0:
+			# left of the clip (the clip view can start further left, see _set_clip)
+			return
+		self._target.vline(x - self._view_x0, y - self._view_y0, length, color)
+		self.mark_dirty(x, y, 1, length)
 
 	def hline(self, x, y, length, color):
 		"""
@@ -607,9 +821,9 @@ class ST7789:
 			length (int): length of line
 			color (int): 565 encoded color
 		"""
-		if self.needs_swap:
-			color = swap_bytes(color)
-		self.fbuf.hline(x, y, length, color)
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		self._target.hline(x - self._view_x0, y - self._view_y0, length, color)
+		self.mark_dirty(x, y, length, 1)
 
 	def pixel(self, x, y, color):
 		"""
@@ -620,22 +834,547 @@ class ST7789:
 			Y (int): y coordinate
 			color (int): 565 encoded color
 		"""
-		if self.needs_swap:
-			color = swap_bytes(color)
-		self.fbuf.pixel(x,y,color)
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		if x < self._clip_x0:
+			# left of the clip (the clip view can start further left, see _set_clip)
+			return
+		self._target.pixel(x - self._view_x0, y - self._view_y0, color)
+		self.mark_dirty(x, y, 1, 1)
+		
+		
+	def encode_color(self, color):
+		"""
+		Convert a 565 color into the value that is stored in the framebuf.
+		
+		Normally this just swaps the bytes (when needed).
+		In indexed mode, this returns the palette index for the color,
+		adding it to the palette if it isn't there yet.
+		Once the palette is full, the closest color in the palette is used.
+		
+		All drawing methods in this driver call this for you.
+		It only needs to be called manually when drawing to self.fbuf directly.
+		Colors from device_color() are returned as they are.
+		"""
+		if color & _DEVICE_COLOR:
+			return color ^ _DEVICE_COLOR
+		if self._lut is None:
+			if self.needs_swap:
+				return swap_bytes(color)
+			return color
+		
+		idx = self._color_index.get(color)
+		if idx is None:
+			idx = self._add_color(color)
+		return idx
+	
+	def device_color(self, color):
+		"""
+		Convert a 565 color into a "device color", which is already encoded for the framebuf.
+		
+		Every drawing method accepts device colors in place of 565 colors,
+		and uses them without calling encode_color() again.
+		This is useful for colors that are drawn over and over (like Config.device_palette()).
+		Device colors only work with the display that made them,
+		and in indexed mode they must be made again after set_palette().
+		"""
+		return self.encode_color(color) | _DEVICE_COLOR
+	
+	def _add_color(self, color):
+		"""Find a palette index for a color that hasn't been used yet."""
+		lut = self._lut
+		if self._palette_len < 256:
+			idx = self._palette_len
+			struct.pack_into(">H", lut, idx * 2, color)
+			self._palette_len += 1
+		else:
+			# palette is full, find the closest match
+			red, green, blue = color >> 11, (color >> 5) & 0x3f, color & 0x1f
+			idx = 0
+			best = 0xffffff
+			for i in range(256):
+				other = (lut[i * 2] << 8) | lut[i * 2 + 1]
+				diff = (
+					((red - (other >> 11)) * 2) ** 2
+					+ (green - ((other >> 5) & 0x3f)) ** 2
+					+ ((blue - (other & 0x1f)) * 2) ** 2
+					)
+				if diff < best:
+					best = diff
+					idx = i
+		self._color_index[color] = idx
+		return idx
+	
+	def set_palette(self, colors):
+		"""
+		Replace the palette used in indexed mode.
 		
+		Colors are used by index, so drawing with colors[0] stores 0 in the framebuf, and so on.
+		Changing the palette changes the color of everything already drawn with it,
+		so the whole display is marked to be sent on the next show().
 		
+		Args:
+			colors (list): up to 256 565 encoded colors (like Config.palette)
+		"""
+		if self._lut is None:
+			raise ValueError("set_palette() only works in indexed mode.")
+		if len(colors) > 256:
+			raise ValueError("The palette can't have more than 256 colors.")
+		
+		self._color_index = {}
+		for idx, color in enumerate(colors):
+			struct.pack_into(">H", self._lut, idx * 2, color)
+			if color not in self._color_index:
+				self._color_index[color] = idx
+		self._palette_len = len(colors)
+		# cached bitmap palettes hold old indexes
+		self._bitmap_palettes = {}
+		self.mark_dirty()
+	
+	@micropython.viper
+	@staticmethod
+	def _expand_rows(src, start: int, stride: int, width: int, rows: int, lut, dst):
+		"""
+		Expand rows of GS8 palette indexes into big-endian RGB565, for sending to the display.
+		
+		Args:
+			src (memoryview): the framebuf
+			start (int): index of the first pixel
+			stride (int): bytes per framebuf row
+			width (int): pixels per row to expand
+			rows (int): number of rows to expand
+			lut (bytearray): 256 colors, as the display expects them
+			dst (memoryview): destination, must hold width * rows * 2 bytes
+		"""
+		s = ptr8(src)
+		p = ptr16(lut)
+		d = ptr16(dst)
+		i = 0
+		for _ in range(rows):
+			for x in range(start, start + width):
+				d[i] = p[s[x]]
+				i += 1
+			start += stride
+	
+	def mark_dirty(self, x=0, y=0, width=_MAX_DIM, height=_MAX_DIM):
+		"""
+		Mark an area of the framebuf as changed, so that it is sent on the next show().
+		
+		All drawing methods in this driver call this for you.
+		It only needs to be called manually when drawing to self.fbuf directly.
+		With no arguments, the entire display is marked.
+		While a clip is set, only the part inside the clip is marked.
+
+		Args:
+			x (int): Top left corner x coordinate
+			y (int): Top left corner y coordinate
+			width (int): Width in pixels
+			height (int): Height in pixels
+		"""
+		x1 = x + width
+		y1 = y + height
+		# clamp to the clip (which is the whole display, unless push_clip was used)
+		if x < self._clip_x0:
+			x = self._clip_x0
+		if y < self._clip_y0:
+			y = self._clip_y0
+		if x1 > self._clip_x1:
+			x1 = self._clip_x1
+		if y1 > self._clip_y1:
+			y1 = self._clip_y1
+		if x >= x1 or y >= y1:
+			return
+		
+		dirty = self.dirty
+		for rect in dirty:
+			if x <= rect[2] and rect[0] <= x1 and y <= rect[3] and rect[1] <= y1:
+				# touching or overlapping an existing area, just grow that one
+				if x < rect[0]:
+					rect[0] = x
+				if y < rect[1]:
+					rect[1] = y
+				if x1 > rect[2]:
+					rect[2] = x1
+				if y1 > rect[3]:
+					rect[3] = y1
+				return
+		
+		dirty.append([x, y, x1, y1])
+		
+		if len(dirty) > _MAX_DIRTY_RECTS:
+			# too many separate areas to be worth the overhead, merge them into one
+			rect = dirty[0]
+			for other in dirty:
+				if other[0] < rect[0]:
+					rect[0] = other[0]
+				if other[1] < rect[1]:
+					rect[1] = other[1]
+				if other[2] > rect[2]:
+					rect[2] = other[2]
+				if other[3] > rect[3]:
+					rect[3] = other[3]
+			dirty.clear()
+			dirty.append(rect)
+	
+	def push_clip(self, x, y, width, height):
+		"""
+		Limit all drawing to a rectangle, until pop_clip() is called.
+		
+		Clips can be nested, each new clip is limited to the clip before it.
+		Drawing methods skip anything that is completely outside of the clip,
+		and framebuf takes care of things that are partly inside.
+		This is useful for scrolling panes, or redrawing just part of the display.
+		Drawing to self.fbuf directly is not clipped.
+		
+		Note: if a reserved_bytearray without a spare row (see __init__) is used,
+		drawing that is partly inside a clip touching the bottom edge can reach to the left of it.
+
+		Args:
+			x (int): Top left corner x coordinate
+			y (int): Top left corner y coordinate
+			width (int): Width in pixels
+			height (int): Height in pixels
+		"""
+		self._clip_stack.append((self._clip_x0, self._clip_y0, self._clip_x1, self._clip_y1))
+		self._set_clip(
+			max(x, self._clip_x0),
+			max(y, self._clip_y0),
+			min(x + width, self._clip_x1),
+			min(y + height, self._clip_y1),
+			)
+	
+	def pop_clip(self):
+		"""Remove the last clip set with push_clip(), going back to the one before it."""
+		if self._clip_stack:
+			self._set_clip(*self._clip_stack.pop())
+	
+	def get_clip(self):
+		"""
+		Get the current clip, as set with push_clip().
+		
+		Returns:
+			tuple: (x, y, width, height), the whole display when there is no clip
+		"""
+		return (
+			self._clip_x0, self._clip_y0,
+			self._clip_x1 - self._clip_x0, self._clip_y1 - self._clip_y0,
+			)
+	
+	def _set_clip(self, x0, y0, x1, y1):
+		"""Set the clip bounds (end exclusive), and make a view of the framebuf for them."""
+		if x1 < x0:
+			x1 = x0
+		if y1 < y0:
+			y1 = y0
+		self._clip_x0 = x0
+		self._clip_y0 = y0
+		self._clip_x1 = x1
+		self._clip_y1 = y1
+		
+		self._view_x0 = x0
+		self._view_y0 = y0
+		
+		if x0 == 0 and y0 == 0 and x1 == self.width and y1 == self.height:
+			self._target = self.fbuf
+			return
+		if x0 == x1 or y0 == y1:
+			# nothing is visible, draw to a spare pixel instead
+			self._target = framebuf.FrameBuffer(bytearray(2), 1, 1, self._format)
+			return
+		
+		pixel_bytes = self._pixel_bytes
+		stride = self._stride
+		start = y0 * stride + x0 * pixel_bytes
+		if start + stride * (y1 - y0) > len(self._fbuf_mv):
+			# FrameBuffer wants a whole stride for the last row, but there's no room after the buffer.
+			# start the view at the left edge instead. the clip itself is unchanged,
+			# so everything else still uses it (only partly clipped drawing can reach left of it).
+			start -= x0 * pixel_bytes
+			self._view_x0 = 0
+		self._target = framebuf.FrameBuffer(
+			self._fbuf_mv[start:], x1 - self._view_x0, y1 - y0, self._format, stride // pixel_bytes
+			)
+	
+	def _clipped(self, x, y, width, height):
+		"""Check if an area is completely outside of the clip."""
+		return (
+			x >= self._clip_x1 or y >= self._clip_y1
+			or x + width <= self._clip_x0 or y + height <= self._clip_y0
+			)
+	
+	def _dirty_is_large(self):
+		"""Check if enough of the display has changed that it should all be sent at once."""
+		area = 0
+		for x0, y0, x1, y1 in self.dirty:
+			area += (x1 - x0) * (y1 - y0)
+		return area * 100 >= self.width * self.height * _FULL_FLUSH_PCT
+	
+	def _show_rect(self, buf, x0, y0, x1, y1):
+		"""
+		Send one area of the given framebuf memoryview to the display. (x1, y1 are exclusive)
+		"""
+		if self._scale > 1:
+			self._show_scaled(buf, x0, y0, x1, y1)
+			return
+		
+		self._set_window(x0, y0, x1 - 1, y1 - 1)
+		
+		stride = self._stride
+		
+		if self.cs:
+			self.cs.off()
+		self.dc.on()
+		if self._lut is not None:
+			# expand palette indexes into colors, a few rows per write
+			line = self._line_mv
+			width = x1 - x0
+			max_rows = len(line) // (width * 2)
+			start = (y0 * stride) + x0
+			while y0 < y1:
+				rows = min(max_rows, y1 - y0)
+				self._expand_rows(buf, start, stride, width, rows, self._lut, line)
+				self.spi.write(line[:width * rows * 2])
+				start += stride * rows
+				y0 += rows
+		elif x0 == 0 and x1 * 2 == stride:
+			# full rows are contiguous in the framebuf, so they can be sent in one write
+			self.spi.write(buf[y0 * stride:y1 * stride])
+		else:
+			start = (y0 * stride) + (x0 * 2)
+			row_len = (x1 - x0) * 2
+			for _ in range(y1 - y0):
+				self.spi.write(buf[start:start + row_len])
+				start += stride
+		if self.cs:
+			self.cs.on()
+
+	@micropython.viper
+	@staticmethod
+	def _upscale_row(src, start: int, width: int, scale: int, out_width: int, rows: int, lut, indexed: int, dst):
+		"""
+		Stretch one framebuf row by 'scale', into 'rows' identical rows of big-endian RGB565.
+		
+		Args:
+			src (memoryview): the framebuf
+			start (int): index of the first pixel (not byte)
+			width (int): framebuf pixels to stretch
+			scale (int): how many times to repeat each pixel
+			out_width (int): pixels per output row (can cut off the last stretched pixel)
+			rows (int): how many copies of the row to write
+			lut (bytearray): palette, when indexed
+			indexed (int): 1 if the framebuf is GS8
+			dst (memoryview): destination, must hold out_width * rows * 2 bytes
+		"""
+		d = ptr16(dst)
+		i = 0
+		if indexed:
+			s8 = ptr8(src)
+			p = ptr16(lut)
+			for x in range(start, start + width):
+				color = p[s8[x]]
+				for _ in range(scale):
+					if i < out_width:
+						d[i] = color
+						i += 1
+		else:
+			s16 = ptr16(src)
+			for x in range(start, start + width):
+				color = s16[x]
+				for _ in range(scale):
+					if i < out_width:
+						d[i] = color
+						i += 1
+		
+		# repeat the row
+		end = out_width * rows
+		while i < end:
+			d[i] = d[i - out_width]
+			i += 1
+	
+	def _show_scaled(self, buf, x0, y0, x1, y1):
+		"""
+		Stretch one area of the (scaled) framebuf to fill the display. (x1, y1 are exclusive)
+		"""
+		scale = self._scale
+		out_x0 = x0 * scale
+		out_y0 = y0 * scale
+		out_x1 = min(x1 * scale, self._display_width)
+		out_y1 = min(y1 * scale, self._display_height)
+		self._set_window(out_x0, out_y0, out_x1 - 1, out_y1 - 1)
+		
+		line = self._line_mv
+		lut = self._lut
+		indexed = 1 if lut is not None else 0
+		if lut is None:
+			lut = line
+		out_width = out_x1 - out_x0
+		row_pixels = self._stride // self._pixel_bytes
+		
+		if self.cs:
+			self.cs.off()
+		self.dc.on()
+		for y in range(y0, y1):
+			rows = min(scale, out_y1 - (y * scale))
+			self._upscale_row(buf, (y * row_pixels) + x0, x1 - x0, scale, out_width, rows, lut, indexed, line)
+			self.spi.write(line[:out_width * rows * 2])
+		if self.cs:
+			self.cs.on()
+	
+	def show_region(self, x, y, width, height):
+		"""
+		Write one area of the framebuf to the display right away.
+
+		This is useful for apps that know exactly what they have changed,
+		like a status bar or a single line of text.
+		Areas marked for the next show() are not affected.
+
+		Args:
+			x (int): Top left corner x coordinate
+			y (int): Top left corner y coordinate
+			width (int): Width in pixels
+			height (int): Height in pixels
+		"""
+		x1 = x + width
+		y1 = y + height
+		# clamp to display
+		if x < 0:
+			x = 0
+		if y < 0:
+			y = 0
+		if x1 > self.width:
+			x1 = self.width
+		if y1 > self.height:
+			y1 = self.height
+		if x < x1 and y < y1:
+			self.wait()
+			self._show_rect(self._fbuf_mv, x, y, x1, y1)
+
 	def show(self):
 		"""
-		Write the current framebuf to the display
+		Write the changed areas of the framebuf to the display.
+		
+		Only the areas drawn to since the last show() are sent.
+		If most of the display has changed, the whole framebuf is sent at once instead.
+		"""
+		if self._front_fbuf is not None:
+			self.show_async()
+			self.wait()
+			return
+		
+		dirty = self.dirty
+		if not dirty:
+			return
+		
+		if self._dirty_is_large():
+			self._show_rect(self._fbuf_mv, 0, 0, self.width, self.height)
+		else:
+			for x0, y0, x1, y1 in dirty:
+				self._show_rect(self._fbuf_mv, x0, y0, x1, y1)
+		
+		dirty.clear()
+	
+	def show_async(self):
+		"""
+		Start sending the changed areas to the display, without waiting for it to finish.
+		
+		When double buffered, the finished frame is handed off to be sent,
+		and drawing can continue on the other buffer right away.
+		Call flush_step() regularly (for example, once per loop) to send the frame a few rows at a time,
+		or wait() to finish sending it. 
+		
+		Note: self.fbuf changes to the other buffer on each call, so don't hold on to it.
+		Without double buffering, this is the same as show().
 		"""
-		self._set_window(0, 0, self.width - 1, self.height - 1)
-		self._write(None, self.fbuf)
+		if self._front_fbuf is None:
+			self.show()
+			return
+		
+		# only one frame can be in flight
+		self.wait()
+		
+		dirty = self.dirty
+		if not dirty:
+			return
+		
+		if self._dirty_is_large():
+			dirty.clear()
+			dirty.append([0, 0, self.width, self.height])
+		
+		# swap buffers
+		self.fbuf, self._front_fbuf = self._front_fbuf, self.fbuf
+		self._fbuf_mv, self._front_mv = self._front_mv, self._fbuf_mv
+		self.dirty, self._front_dirty = self._front_dirty, dirty
+		# the clip view points into the old back buffer
+		self._set_clip(self._clip_x0, self._clip_y0, self._clip_x1, self._clip_y1)
+		
+		# the new back buffer still holds the frame before this one,
+		# copying the changed areas over brings it up to date.
+		back = self._fbuf_mv
+		front = self._front_mv
+		stride = self._stride
+		pixel_bytes = self._pixel_bytes
+		for x0, y0, x1, y1 in dirty:
+			start = (y0 * stride) + (x0 * pixel_bytes)
+			if x0 == 0 and x1 * pixel_bytes == stride:
+				end = y1 * stride
+				back[start:end] = front[start:end]
+			else:
+				row_len = (x1 - x0) * pixel_bytes
+				for _ in range(y1 - y0):
+					back[start:start + row_len] = front[start:start + row_len]
+					start += stride
+		
+		self._flush = self._flush_gen(dirty)
+	
+	def _flush_gen(self, rects):
+		"""
+		Generator that sends the given areas of the front buffer, a band of rows at a time.
+		
+		The window is set again for each band,
+		so other display commands can safely be sent between steps.
+		"""
+		buf = self._front_mv
+		for x0, y0, x1, y1 in rects:
+			while y0 < y1:
+				band_end = min(y0 + _FLUSH_BAND_ROWS, y1)
+				self._show_rect(buf, x0, y0, x1, band_end)
+				y0 = band_end
+				yield
+		rects.clear()
+	
+	def flush_step(self):
+		"""
+		Send the next few rows of a frame started with show_async().
+		
+		This can be called from a main loop, or from a uasyncio task:
+			while tft.flush_step():
+				await asyncio.sleep_ms(0)
+		
+		Returns:
+			bool: True if there is more of the frame left to send.
+		"""
+		if self._flush is None:
+			return False
+		try:
+			next(self._flush)
+			return True
+		except StopIteration:
+			self._flush = None
+			return False
+	
+	def wait(self):
+		"""
+		Block until the frame started with show_async() has been completely sent.
+		"""
+		while self.flush_step():
+			pass
 		
 		
 	def blit_buffer(self, buffer, x, y, width, height, key=-1, palette=None):
 		"""
 		Copy buffer to display framebuf at the given location.
+		The buffer must be in the same format as the framebuf (GS8 in indexed mode).
+		The FrameBuffer wrapping the buffer is reused when the same buffer is drawn again,
+		use register_buffer() for buffers that are drawn all the time.
 
 		Args:
 			buffer (bytes): Data to copy to display
@@ -646,9 +1385,61 @@ class ST7789:
 			key (int): color to be considered transparent
 			palette (framebuf): the color pallete to use for the buffer
 		"""
-		self.fbuf.blit(framebuf.FrameBuffer(buffer,width, height, framebuf.RGB565), x,y,key,palette)
+		if self._clipped(x, y, width, height):
+			return
+		self._target.blit(
+			self._buffer_fbuf(buffer, width, height), x - self._view_x0, y - self._view_y0, key, palette
+			)
+		self.mark_dirty(x, y, width, height)
+
+	def _buffer_fbuf(self, buffer, width, height):
+		"""
+		Get a FrameBuffer wrapping buffer, reusing one from a previous call if possible.
+		A few recent wrappers are kept, plus the ones for buffers given to register_buffer().
+		"""
+		buffer_id = id(buffer)
+		entry = self._registered_buffers.get(buffer_id) or self._blit_wrappers.get(buffer_id)
+		if entry is not None and entry[1] == width and entry[2] == height:
+			return entry[3]
+
+		entry = (buffer, width, height, framebuf.FrameBuffer(buffer, width, height, self._format))
+		if buffer_id in self._registered_buffers:
+			self._registered_buffers[buffer_id] = entry
+		else:
+			if len(self._blit_wrappers) >= _MAX_BLIT_WRAPPERS:
+				self._blit_wrappers.clear()
+			self._blit_wrappers[buffer_id] = entry
+		return entry[3]
+
+	def register_buffer(self, buffer, width, height):
+		"""
+		Keep a FrameBuffer wrapper for a long-lived buffer, so that
+		blit_buffer() never has to make a new one for it.
+		This is useful for sprites, or any other buffer that is drawn over and over.
+		The driver holds on to the buffer until unregister_buffer() is called.
+
+		Args:
+			buffer (bytearray): Data in the same format as the framebuf (GS8 in indexed mode)
+			width (int): Width
+			height (int): Height
+
+		Returns:
+			framebuf.FrameBuffer: the wrapper, which can also be used with blit_framebuf()
+		"""
+		self._blit_wrappers.pop(id(buffer), None)
+		self._registered_buffers[id(buffer)] = None
+		return self._buffer_fbuf(buffer, width, height)
+
+	def unregister_buffer(self, buffer):
+		"""
+		Forget a buffer given to register_buffer().
+
+		Args:
+			buffer (bytearray): the registered buffer
+		"""
+		self._registered_buffers.pop(id(buffer), None)
 		
-	def blit_framebuf(self, fbuf, x, y, key=-1, palette=None):
+	def blit_framebuf(self, fbuf, x, y, key=-1, palette=None, width=_MAX_DIM, height=_MAX_DIM):
 		"""
 		Copy FrameBuffer to internal FrameBuffer at the given location.
 		
@@ -660,13 +1451,16 @@ class ST7789:
 			fbuf (bytes): Data to copy to display
 			x (int): Top left corner x coordinate
 			Y (int): Top left corner y coordinate
-			width (int): Width
-			height (int): Height
-			buffer_format (framebuf format): the color format to use for the blit function. 
 			key (int): color to be considered transparent
 			palette (framebuf): the color pallete to use for the buffer
+			width (int): Width of fbuf. Used to mark the changed area for show()
+			height (int): Height of fbuf. When width/height are not given, 
+				everything right of and below (x, y) is marked as changed.
 		"""
-		self.fbuf.blit(fbuf, x,y,key,palette)
+		if self._clipped(x, y, width, height):
+			return
+		self._target.blit(fbuf, x - self._view_x0, y - self._view_y0, key, palette)
+		self.mark_dirty(x, y, width, height)
 
 	def rect(self, x, y, w, h, color, fill=False):
 		"""
@@ -679,9 +1473,11 @@ class ST7789:
 			height (int): Height in pixels
 			color (int): 565 encoded color
 		"""
-		if self.needs_swap:
-			color = swap_bytes(color)
-		self.fbuf.rect(x,y,w,h,color,fill)
+		if self._clipped(x, y, w, h):
+			return
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		self._target.rect(x - self._view_x0, y - self._view_y0, w, h, color, fill)
+		self.mark_dirty(x, y, w, h)
 		
 	def ellipse(self, x, y, xr, yr, color, fill=False):
 		"""
@@ -695,9 +1491,11 @@ class ST7789:
 			color (int): 565 encoded color
 			fill (bool): fill in the ellipse. Default is False
 		"""
-		if self.needs_swap:
-			color = swap_bytes(color)
-		self.fbuf.ellipse(x,y,xr,yr,color,fill)
+		if self._clipped(x - xr, y - yr, xr * 2 + 1, yr * 2 + 1):
+			return
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		self._target.ellipse(x - self._view_x0, y - self._view_y0, xr, yr, color, fill)
+		self.mark_dirty(x - xr, y - yr, xr * 2 + 1, yr * 2 + 1)
 
 	def fill_rect(self, x, y, width, height, color):
 		"""
@@ -718,13 +1516,23 @@ class ST7789:
 	def fill(self, color):
 		"""
 		Fill the entire FrameBuffer with the specified color.
+		While a clip is set (see push_clip), only the clip is filled.
 
 		Args:
 			color (int): 565 encoded color
 		"""
-		if self.needs_swap:
-			color = swap_bytes(color)
-		self.fbuf.fill(color)
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		if self._view_x0 == self._clip_x0:
+			self._target.fill(color)
+		else:
+			# the view is wider than the clip (see _set_clip)
+			self._target.rect(
+				self._clip_x0 - self._view_x0, 0,
+				self._clip_x1 - self._clip_x0, self._clip_y1 - self._clip_y0, color, True
+				)
+		if self._target is self.fbuf:
+			self.dirty.clear()
+		self.mark_dirty()
 
 	def line(self, x0, y0, x1, y1, color):
 		"""
@@ -737,9 +1545,13 @@ class ST7789:
 			y1 (int): End point y coordinate
 			color (int): 565 encoded color
 		"""
-		if self.needs_swap:
-			color = swap_bytes(color)
-		self.fbuf.line(x0, y0, x1, y1, color)
+		if self._clipped(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1):
+			return
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		view_x0 = self._view_x0
+		view_y0 = self._view_y0
+		self._target.line(x0 - view_x0, y0 - view_y0, x1 - view_x0, y1 - view_y0, color)
+		self.mark_dirty(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1)
 
 	def vscrdef(self, tfa, vsa, bfa):
 		"""
@@ -784,73 +1596,31 @@ class ST7789:
 
 		Unlike vscsad which uses the hardware for scrolling,
 		this method scrolls the framebuffer itself.
-		This is a wrapper for the framebuffer.scroll method:
+		This is a wrapper for the framebuffer.scroll method.
+		While a clip is set (see push_clip), only the clip is scrolled.
 		"""
-		self.fbuf.scroll(xstep,ystep)
+		self._target.scroll(xstep,ystep)
+		self.mark_dirty()
 
-	@micropython.viper
-	@staticmethod
-	def _pack8(glyphs, idx: uint, fg_color: uint, bg_color: uint):
-		buffer = bytearray(128)
-		bitmap = ptr16(buffer)
-		glyph = ptr8(glyphs)
-
-		for i in range(0, 64, 8):
-			byte = glyph[idx]
-			bitmap[i] = fg_color if byte & _BIT7 else bg_color
-			bitmap[i + 1] = fg_color if byte & _BIT6 else bg_color
-			bitmap[i + 2] = fg_color if byte & _BIT5 else bg_color
-			bitmap[i + 3] = fg_color if byte & _BIT4 else bg_color
-			bitmap[i + 4] = fg_color if byte & _BIT3 else bg_color
-			bitmap[i + 5] = fg_color if byte & _BIT2 else bg_color
-			bitmap[i + 6] = fg_color if byte & _BIT1 else bg_color
-			bitmap[i + 7] = fg_color if byte & _BIT0 else bg_color
-			idx += 1
-
-		return buffer
-
-	@micropython.viper
-	@staticmethod
-	def _pack16(glyphs, idx: uint, fg_color: uint, bg_color: uint):
+	def _glyph(self, font, ch):
 		"""
-		Pack a character into a byte array.
-
-		Args:
-			char (str): character to pack
-
-		Returns:
-			128 bytes: character bitmap in color565 format
-		"""
-
-		buffer = bytearray(256)
-		bitmap = ptr16(buffer)
-		glyph = ptr8(glyphs)
-
-		for i in range(0, 128, 16):
-			byte = glyph[idx]
-
-			bitmap[i] = fg_color if byte & _BIT7 else bg_color
-			bitmap[i + 1] = fg_color if byte & _BIT6 else bg_color
-			bitmap[i + 2] = fg_color if byte & _BIT5 else bg_color
-			bitmap[i + 3] = fg_color if byte & _BIT4 else bg_color
-			bitmap[i + 4] = fg_color if byte & _BIT3 else bg_color
-			bitmap[i + 5] = fg_color if byte & _BIT2 else bg_color
-			bitmap[i + 6] = fg_color if byte & _BIT1 else bg_color
-			bitmap[i + 7] = fg_color if byte & _BIT0 else bg_color
-			idx += 1
-
-			byte = glyph[idx]
-			bitmap[i + 8] = fg_color if byte & _BIT7 else bg_color
-			bitmap[i + 9] = fg_color if byte & _BIT6 else bg_color
-			bitmap[i + 10] = fg_color if byte & _BIT5 else bg_color
-			bitmap[i + 11] = fg_color if byte & _BIT4 else bg_color
-			bitmap[i + 12] = fg_color if byte & _BIT3 else bg_color
-			bitmap[i + 13] = fg_color if byte & _BIT2 else bg_color
-			bitmap[i + 14] = fg_color if byte & _BIT1 else bg_color
-			bitmap[i + 15] = fg_color if byte & _BIT0 else bg_color
-			idx += 1
-
-		return buffer
+		Get a blittable (buffer, width, height, format) tuple for a character.
+		
+		The tuple points directly into the font data (which framebuf reads as MONO_HLSB),
+		so nothing is copied, and it is reused on every following draw.
+		"""
+		glyphs = self._font_glyphs.get(font)
+		if glyphs is None:
+			glyphs = [None] * (font.LAST - font.FIRST)
+			self._font_glyphs[font] = glyphs
+		
+		idx = ch - font.FIRST
+		glyph = glyphs[idx]
+		if glyph is None:
+			size = (font.WIDTH * font.HEIGHT) // 8
+			glyph = (font.FONT[idx * size:(idx + 1) * size], font.WIDTH, font.HEIGHT, framebuf.MONO_HLSB)
+			glyphs[idx] = glyph
+		return glyph
 
 	def _text8(self, font, text, x0, y0, fg_color=WHITE):
 		"""
@@ -868,7 +1638,12 @@ class ST7789:
 			bg_color = 1
 		else:
 			bg_color = 0
-			
+		
+		palette = self._text_palette
+		palette.pixel(0, 0, bg_color)
+		palette.pixel(1, 0, fg_color)
+		view_x0 = self._view_x0
+		view_y0 = self._view_y0
 		for char in text:
 			ch = ord(char)
 			if (
@@ -876,20 +1651,7 @@ class ST7789:
 				and x0 + font.WIDTH <= self.width
 				and y0 + font.HEIGHT <= self.height
 			):
-				if font.HEIGHT == 8:
-					passes = 1
-					size = 8
-					each = 0
-				else:
-					passes = 2
-					size = 16
-					each = 8
-
-				for line in range(passes):
-					idx = (ch - font.FIRST) * size + (each * line)
-					buffer = self._pack8(font.FONT, idx, fg_color, bg_color)
-					self.blit_buffer(buffer, x0, y0 + 8 * line, 8, 8,key=bg_color)
-
+				self._target.blit(self._glyph(font, ch), x0 - view_x0, y0 - view_y0, bg_color, palette)
 				x0 += 8
 
 	def _text16(self, font, text, x0, y0, fg_color=WHITE):
@@ -908,6 +1670,12 @@ class ST7789:
 			bg_color = 1
 		else:
 			bg_color = 0
+		
+		palette = self._text_palette
+		palette.pixel(0, 0, bg_color)
+		palette.pixel(1, 0, fg_color)
+		view_x0 = self._view_x0
+		view_y0 = self._view_y0
 		for char in text:
 			ch = ord(char)
 			if (
@@ -915,18 +1683,7 @@ class ST7789:
 				and x0 + font.WIDTH <= self.width
 				and y0 + font.HEIGHT <= self.height
 			):
-				each = 16
-				if font.HEIGHT == 16:
-					passes = 2
-					size = 32
-				else:
-					passes = 4
-					size = 64
-
-				for line in range(passes):
-					idx = (ch - font.FIRST) * size + (each * line)
-					buffer = self._pack16(font.FONT, idx, fg_color, bg_color)
-					self.blit_buffer(buffer, x0, y0 + 8 * line, 16, 8,key=bg_color)
+				self._target.blit(self._glyph(font, ch), x0 - view_x0, y0 - view_y0, bg_color, palette)
 			x0 += 16
 
 	def text(self, text, x, y, color=WHITE):
@@ -941,9 +1698,11 @@ class ST7789:
 			y (int): row to start drawing at
 			color (int): 565 encoded color to use for text
 		"""
-		if self.needs_swap:
-			color = swap_bytes(color)
-		self.fbuf.text(text, x, y, color)
+		if self._clipped(x, y, len(text) * 8, 8):
+			return
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		self._target.text(text, x - self._view_x0, y - self._view_y0, color)
+		self.mark_dirty(x, y, len(text) * 8, 8)
 
 	def bitmap_text(self, font, text, x0, y0, color=WHITE):
 		"""
@@ -957,13 +1716,119 @@ class ST7789:
 			y0 (int): row to start drawing at
 			color (int): 565 encoded color to use for characters
 		"""
-		if self.needs_swap:
-			color=swap_bytes(color)
+		if self._clipped(x0, y0, len(text) * font.WIDTH, font.HEIGHT):
+			return
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
 
 		if font.WIDTH == 8:
 			self._text8(font, text, x0, y0, color)
 		else:
 			self._text16(font, text, x0, y0, color)
+		self.mark_dirty(x0, y0, len(text) * font.WIDTH, font.HEIGHT)
+
+	@micropython.viper
+	@staticmethod
+	def _flip_gs2(src, dst, length: int):
+		"""
+		Reverse the order of the 4 pixels in each byte of 2 bit image data.
+		Converted bitmaps store the first pixel in the high bits, but GS2_HMSB expects it in the low bits.
+
+		Args:
+			src (memoryview): the bitmap data
+			dst (bytearray): destination, at least length bytes long
+			length (int): number of bytes to convert
+		"""
+		s = ptr8(src)
+		d = ptr8(dst)
+		for i in range(length):
+			b = s[i]
+			d[i] = ((b >> 6) & 0x03) | ((b >> 2) & 0x0c) | ((b << 2) & 0x30) | ((b << 6) & 0xc0)
+
+	@micropython.viper
+	@staticmethod
+	def _unpack_gs8(src, bs_bit: int, dst, length: int, bpp: int):
+		"""
+		Unpack a converted bitmap's bitstream to one byte (one palette index) per pixel.
+
+		Args:
+			src (memoryview): the bitmap data
+			bs_bit (int): bit offset of the first pixel
+			dst (bytearray): destination, at least length bytes long
+			length (int): number of pixels to unpack
+			bpp (int): bits per pixel in the bitstream
+		"""
+		s = ptr8(src)
+		d = ptr8(dst)
+		for i in range(length):
+			color_index = 0
+			for _ in range(bpp):
+				color_index = (color_index << 1) | ((s[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1)
+				bs_bit += 1
+			d[i] = color_index
+
+	def _bitmap_source(self, cache_key, data, bs_bit, width, height, bpp):
+		"""
+		Get a palette based image that framebuf can blit, for a converted bitmap.
+		1, 4, and 8 bit images with byte aligned rows are used in place,
+		anything else is converted once, and the result is kept for next time.
+
+		Args:
+			cache_key: the bitmap buffer, or something else that identifies the image
+			data (memoryview): the bitmap data
+			bs_bit (int): bit offset of the image in data
+			width (int): image width
+			height (int): image height
+			bpp (int): bits per pixel
+
+		Returns:
+			tuple: (buffer, width, height, format) for FrameBuffer.blit
+		"""
+		source = self._bitmap_sources.get(cache_key)
+		if source is not None:
+			return source
+
+		row_bits = width * bpp
+		if bs_bit & 7 == 0 and row_bits & 7 == 0:
+			data = data[bs_bit >> 3:(bs_bit + row_bits * height) >> 3]
+			if bpp == 8:
+				source = (data, width, height, framebuf.GS8)
+			elif bpp == 4:
+				source = (data, width, height, framebuf.GS4_HMSB)
+			elif bpp == 2:
+				buffer = bytearray(len(data))
+				self._flip_gs2(data, buffer, len(data))
+				source = (buffer, width, height, framebuf.GS2_HMSB)
+			elif bpp == 1:
+				source = (data, width, height, framebuf.MONO_HLSB)
+
+		if source is None:
+			buffer = bytearray(width * height)
+			self._unpack_gs8(data, bs_bit, buffer, width * height, bpp)
+			source = (buffer, width, height, framebuf.GS8)
+
+		self._bitmap_sources[cache_key] = source
+		return source
+
+	def _bitmap_palette(self, cache_key, colors, bpp):
+		"""
+		Get a palette FrameBuffer for blitting a bitmap, with colors swapped for the display if needed.
+		The palette is made once per cache_key, and the given colors are never modified.
+		Unused palette entries are filled with the last color.
+
+		Args:
+			cache_key: anything that identifies this set of colors
+			colors (list): 565 encoded colors
+			bpp (int): bits per pixel of the bitmap
+		"""
+		palette = self._bitmap_palettes.get(cache_key)
+		if palette is None:
+			size = 1 << bpp
+			palette = framebuf.FrameBuffer(bytearray(size * 2), size, 1, framebuf.RGB565)
+			for i in range(size):
+				color = colors[i] if i < len(colors) else colors[-1]
+				palette.pixel(i, 0, self.encode_color(color))
+			self._bitmap_palettes[cache_key] = palette
+		return palette
 
 	def bitmap(self, bitmap, x, y, index=0, key=-1):
 		"""
@@ -981,38 +1846,19 @@ class ST7789:
 		height = bitmap.HEIGHT
 		to_col = x + width - 1
 		to_row = y + height - 1
-		if self.width <= to_col or self.height <= to_row:
+		if self.width <= to_col or self.height <= to_row or self._clipped(x, y, width, height):
 			return
 
-		bitmap_size = height * width
-		buffer_len = bitmap_size * 2
 		bpp = bitmap.BPP
-		bs_bit = bpp * bitmap_size * index  # if index > 0 else 0
-		palette = bitmap.PALETTE
-		
-		#swap colors if needed:
-		if self.needs_swap:
-			for i in range(0,len(palette)):
-				palette[i] = swap_bytes(palette[i])
-		
-		buffer = bytearray(buffer_len)
-
-		for i in range(0, buffer_len, 2):
-			color_index = 0
-			for _ in range(bpp):
-				color_index = (color_index << 1) | (
-					(bitmap.BITMAP[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1
-				)
-				bs_bit += 1
-
-			color = palette[color_index]
+		source = self._bitmap_source(
+			(bitmap, index), bitmap.BITMAP, bpp * width * height * index, width, height, bpp
+			)
+		palette = self._bitmap_palette(bitmap, bitmap.PALETTE, bpp)
+		if key != -1:
+			key = self.encode_color(key)
 
-			buffer[i] = color & 0xFF
-			buffer[i + 1] = color >> 8
-		
-		self.blit_buffer(buffer,x,y,width,height,key=key)
-		#self._set_window(x, y, to_col, to_row)
-		#self._write(None, buffer)
+		self._target.blit(source, x - self._view_x0, y - self._view_y0, key, palette)
+		self.mark_dirty(x, y, width, height)
 
 	def bitmap_icons(self, bitmap_module, bitmap, color, x, y, invert_colors=False):
 		"""
@@ -1035,40 +1881,25 @@ class ST7789:
 		height = bitmap_module.HEIGHT
 		to_col = x + width - 1
 		to_row = y + height - 1
-		if self.width <= to_col or self.height <= to_row:
+		if self.width <= to_col or self.height <= to_row or self._clipped(x, y, width, height):
 			return
 
-		bitmap_size = height * width
-		buffer_len = bitmap_size * 2
 		bpp = bitmap_module.BPP
-		bs_bit = 0
-		needs_swap = self.needs_swap
-		buffer = bytearray(buffer_len)
-		
-		if self.needs_swap:
-			color = swap_bytes(color)
-			
-		#prevent bg color from being invisible
-		if color == 0:
-			palette = (65535, color)
-		else:
-			palette = (0, color)
-		
-		for i in range(0, buffer_len, 2):
-			color_index = 0
-			for _ in range(bpp):
-				color_index = (color_index << 1) | (
-					(bitmap[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1
-				)
-				bs_bit += 1
-
-			color = palette[color_index]
-
-			buffer[i] = color & 0xFF
-			buffer[i + 1] = color >> 8
+		source = self._bitmap_source(bitmap, bitmap, 0, width, height, bpp)
+
+		#prevent bg color from being invisible.
+		#this is checked after encoding, because different colors can encode the same
+		#(device colors, or nearest matches in a full indexed palette)
+		fg = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		bg = 1 if fg == 0 else 0
+		# icon palettes are cached by color (and bpp, which sets the palette size)
+		palette = self._bitmap_palette(
+			(color << 4) | bpp, (bg | _DEVICE_COLOR, fg | _DEVICE_COLOR), bpp
+			)
 
-		
-		self.blit_buffer(buffer,x,y,width,height,key=palette[0])
+		# the background is keyed out, so it only has to differ from fg
+		self._target.blit(source, x - self._view_x0, y - self._view_y0, bg, palette)
+		self.mark_dirty(x, y, width, height)
 				
 			
 #     def write(self, font, string, x, y, fg=WHITE, bg=None):
@@ -1112,6 +1943,50 @@ class ST7789:
 #             except ValueError:
 #                 pass
 
+	@micropython.viper
+	@staticmethod
+	def _unpack_bits(bitmaps, bs_bit: int, buffer, width: int, height: int, row_bytes: int):
+		"""
+		Copy one glyph out of a converted true-type font's packed bitstream,
+		into byte-aligned MONO_HLSB rows that framebuf can blit.
+
+		Args:
+			bitmaps (memoryview): the font's BITMAPS
+			bs_bit (int): bit offset of the glyph in the bitstream
+			buffer (bytearray): destination, at least row_bytes * height long
+			width (int): glyph width in pixels
+			height (int): glyph height in pixels
+			row_bytes (int): bytes per row in the destination
+		"""
+		src = ptr8(bitmaps)
+		dst = ptr8(buffer)
+		for i in range(row_bytes * height):
+			dst[i] = 0
+		
+		for y in range(height):
+			row = y * row_bytes
+			for x in range(width):
+				if src[bs_bit >> 3] & (0x80 >> (bs_bit & 7)):
+					dst[row + (x >> 3)] = dst[row + (x >> 3)] | (0x80 >> (x & 7))
+				bs_bit += 1
+	
+	def _write_font(self, font):
+		"""
+		Get the lookup info for a converted true-type font, building it the first time the font is used.
+		
+		Returns:
+			tuple: ({codepoint: index}, glyph buffer, bytes per glyph row, {width: blittable tuple})
+		"""
+		info = self._write_fonts.get(font)
+		if info is None:
+			index = {}
+			for idx, char in enumerate(font.MAP):
+				index[ord(char)] = idx
+			row_bytes = (font.MAX_WIDTH + 7) // 8
+			info = (index, bytearray(row_bytes * font.HEIGHT), row_bytes, {})
+			self._write_fonts[font] = info
+		return info
+
 	def write(self, font, string, x, y, fg=WHITE):
 		"""
 		Write a string using a converted true-type font on the display starting
@@ -1123,38 +1998,61 @@ class ST7789:
 			x (int): column to start writing
 			y (int): row to start writing
 			fg (int): foreground color, optional, defaults to WHITE
-			bg (int): background color, optional, defaults to None
 		"""
-		if self.needs_swap:
-			fg = swap_bytes(fg)
-			
+		height = font.HEIGHT
+		if y >= self._clip_y1 or y + height <= self._clip_y0:
+			return
+		fg = fg ^ _DEVICE_COLOR if fg & _DEVICE_COLOR else self.encode_color(fg)
+		if fg == 0:
+			bg = 1
+		else:
+			bg = 0
+		
+		palette = self._text_palette
+		palette.pixel(0, 0, bg)
+		palette.pixel(1, 0, fg)
+		
+		index, buffer, row_bytes, shapes = self._write_font(font)
+		offsets = font.OFFSETS
+		offset_width = font.OFFSET_WIDTH
+		clip_x0 = self._clip_x0
+		clip_x1 = self._clip_x1
+		view_x0 = self._view_x0
+		target_y = y - self._view_y0
+		
+		start_x = x
 		for character in string:
-			try:
-				char_index = font.MAP.index(character)
-				offset = char_index * font.OFFSET_WIDTH
-				bs_bit = font.OFFSETS[offset]
-				
-				if font.OFFSET_WIDTH > 2:
-					bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 2]
-				elif font.OFFSET_WIDTH > 1:
-					bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 1]
-				
-				char_width = font.WIDTHS[char_index]
-				buffer_needed = char_width * font.HEIGHT
-				
-				for i in range(0, buffer_needed):
-					px_x = x + ((i) % char_width)
-					px_y = y + ((i) // char_width)
-					if font.BITMAPS[bs_bit // 8] & 1 << (7 - (bs_bit % 8)) > 0:
-						self.fbuf.pixel(px_x,px_y,fg)
-					
-					bs_bit += 1
-
+			if x >= clip_x1:
+				# the rest of the string is clipped
+				break
+			char_index = index.get(ord(character))
+			if char_index is None:
+				print("write() skipped a character that doesn't exist in the font")
+				continue
+			
+			offset = char_index * offset_width
+			bs_bit = offsets[offset]
+			if offset_width > 1:
+				bs_bit = (bs_bit << 8) + offsets[offset + 1]
+			if offset_width > 2:
+				bs_bit = (bs_bit << 8) + offsets[offset + 2]
+			
+			char_width = font.WIDTHS[char_index]
+			if x + char_width <= clip_x0:
 				x += char_width
-
-			except ValueError:
-				print("ValueError in write; probably because a char used doesn't exists in the font")
-				pass
+				continue
+			self._unpack_bits(font.BITMAPS, bs_bit, buffer, char_width, height, row_bytes)
+			
+			# the glyph buffer is reused, so one blit tuple per width is enough
+			shape = shapes.get(char_width)
+			if shape is None:
+				shape = (buffer, char_width, height, framebuf.MONO_HLSB, row_bytes * 8)
+				shapes[char_width] = shape
+			self._target.blit(shape, x - view_x0, target_y, bg, palette)
+			
+			x += char_width
+		
+		self.mark_dirty(start_x, y, x - start_x, height)
 
 	def write_width(self, font, string):
 		"""
@@ -1169,13 +2067,13 @@ class ST7789:
 			int: The width of the string in pixels
 
 		"""
+		index = self._write_font(font)[0]
+		widths = font.WIDTHS
 		width = 0
 		for character in string:
-			try:
-				char_index = font.MAP.index(character)
-				width += font.WIDTHS[char_index]
-			except ValueError:
-				pass
+			char_index = index.get(ord(character))
+			if char_index is not None:
+				width += widths[char_index]
 
 		return width
 	
@@ -1189,13 +2087,23 @@ class ST7789:
 			y (int): Y-coordinate of the polygon's position.
 			color (int): 565 encoded color.
 		"""
-		if self.needs_swap:
-			color = swap_bytes(color)
-		self.fbuf.poly(x,y,points,color,fill)
+		self._draw_poly(points, x, y, color, fill)
 	
+	def _draw_poly(self, points, x, y, color, fill):
+		"""Draw a polygon with framebuf, and mark the area it covers as changed."""
+		min_x, min_y, max_x, max_y = _poly_bounds(points)
+		x0 = x + min_x
+		y0 = y + min_y
+		width = max_x - min_x + 1
+		height = max_y - min_y + 1
+		if self._clipped(x0, y0, width, height):
+			return
+		color = color ^ _DEVICE_COLOR if color & _DEVICE_COLOR else self.encode_color(color)
+		self._target.poly(x - self._view_x0, y - self._view_y0, points, color, fill)
+		self.mark_dirty(x0, y0, width, height)
 	
 	
-	def polygon(self, points, x, y, color, angle=0, center_x=None, center_y=None, scale=1, warp=None, fill=False):
+	def polygon(self, points, x, y, color, angle=0, center_x=None, center_y=None, scale=1, warp=None, fill=False, scratch=None):
 		"""
 		Draw a polygon on the display.
 
@@ -1207,36 +2115,40 @@ class ST7789:
 			angle (float): Rotation angle in radians (default: 0).
 			center_x (int): X-coordinate of the rotation center (default: 0).
 			center_y (int): Y-coordinate of the rotation center (default: 0).
+			scratch (array('h')): Optional array (exactly as long as points) to hold the transformed points.
+				By default, the display keeps one to reuse.
 		"""
 		
 		#simple poly wrapper
 		if angle == 0 and scale == 1 and warp == None:
-			if self.needs_swap:
-				color = swap_bytes(color)
-			self.fbuf.poly(x,y,points,color,fill)
+			self._draw_poly(points, x, y, color, fill)
 		
 		#complex polygon
 		else:
-			if self.needs_swap:
-				color = swap_bytes(color)
-			#clone array so we don't modify original
-			points = array.array('h',points)
-			
-			#scale
-			if scale != 1:
-				scale_poly(points,scale)
+			#transform into the scratch array so we don't modify original
+			if isinstance(points, (list, tuple)):
+				points = array.array('h', points)
+			length = len(points)
+			if scratch is None:
+				scratch = self._poly_scratch.get(length)
+				if scratch is None:
+					scratch = array.array('h', bytes(length * 2))
+					self._poly_scratch[length] = scratch
+			elif len(scratch) != length:
+				# poly() uses the whole array, and slicing it here would allocate every frame
+				raise ValueError(f"scratch holds {len(scratch)} values, but there are {length} points.")
 			
 			if center_x == None:
-				center_x = max(points) // 2
+				center_x = floor(max(points) * scale) // 2
 			if center_y == None:
-				center_y = max(points) // 2
+				center_y = floor(max(points) * scale) // 2
 			
-			#rotate
-			if angle != 0:
-				points = rotate_points(points, angle, center_x, center_y)
+			#scale and rotate
+			transform_points(points, scratch, angle, scale, center_x, center_y)
+			points = scratch
 				
 			if warp != None:
 				warp_points(points, warp)
 			
-			self.fbuf.poly(x,y,points,color,fill)
+			self._draw_poly(points, x, y, color, fill)
 
@@ -39,6 +39,8 @@ This driver supports:
   BIOS text mode fonts.
 - Drawing text using converted TrueType fonts.
 - Drawing converted bitmaps
+- Filled polygons and thick lines
+- Clipping drawing to a rectangle
 - Named color constants
 
   - BLACK
@@ -52,7 +54,7 @@ This driver supports:
 
 """
 
-from math import sin, cos
+from math import sin, cos, sqrt
 
 #
 # This allows sphinx to build the docs
@@ -81,6 +83,8 @@ except ImportError:
 #
 
 import struct
+from array import array
+from lib.glyphcache import GlyphCache
 
 # ST7789 commands
 _ST7789_SWRESET = b"\x01"
@@ -139,6 +143,16 @@ _ENCODE_POS_16 = const("<HH")
 # must be at least 256 for 16 bit wide fonts
 _BUFFER_SIZE = const(256)
 
+# starting size of the scratch buffer used for text, it grows if a font needs more
+_SCRATCH_SIZE = const(2048)
+
+# text is drawn in bands of up to this many bytes, one window per band.
+# a 240 pixel wide line of an 8x16 font fits in one band.
+_TEXT_BAND_SIZE = const(8192)
+
+# how many encoded bitmap palettes to keep around
+_MAX_PALETTES = const(16)
+
 _BIT7 = const(0x80)
 _BIT6 = const(0x40)
 _BIT5 = const(0x20)
@@ -257,6 +271,10 @@ class ST7789:
 		custom_rotations (tuple): custom rotation definitions
 
 		  - ((width, height, xstart, ystart, madctl, needs_swap), ...)
+		
+		glyph_cache_size (int): max bytes of pre-rendered characters to keep for text().
+			0 disables the cache. By default, the cache gets room for a full line
+			of each font used (15KB for vga2_16x32, 7.5KB for vga1_8x16).
 
 	"""
 
@@ -273,6 +291,7 @@ class ST7789:
 		color_order=BGR,
 		custom_init=None,
 		custom_rotations=None,
+		glyph_cache_size=None,
 	):
 		"""
 		Initialize display.
@@ -301,6 +320,25 @@ class ST7789:
 		self._rotation = rotation % 4
 		self.color_order = color_order
 		self.init_cmds = custom_init or _ST7789_INIT_CMDS
+		self.glyph_cache = GlyphCache(glyph_cache_size, max(width, height))
+		# bitmap palettes encoded for the display, {bitmap module or palette: bytearray}
+		self._palettes = {}
+		# straight runs of pixels found by line(), 3 values (x, y, length) per run
+		self._runs = array("h", bytes(6 * (max(width, height) + 1)))
+		# reusable transfer buffers, so that drawing doesn't allocate.
+		# memoryview slices of them are kept in the views dicts, {length: memoryview}
+		self._window = bytearray(4)
+		self._pixel = bytearray(2)
+		self._fill_buffer = bytearray(_BUFFER_SIZE * 2)
+		self._fill_views = {}
+		self._fill_value = None
+		self._write_palette = bytearray(4)
+		self._scratch = bytearray(_SCRATCH_SIZE)
+		self._scratch_views = {}
+		# drawing is limited to the clip (see push_clip), which is the whole display when not clipping.
+		# (x1, y1 are exclusive)
+		self._clip_stack = []
+		self._clip_x0 = self._clip_y0 = self._clip_x1 = self._clip_y1 = 0
 		self.hard_reset()
 		# yes, twice, once is not always enough
 		self.init(self.init_cmds)
@@ -414,6 +452,11 @@ class ST7789:
 			self.ystart,
 			self.needs_swap,
 		) = self.rotations[rotation]
+		# encoded palettes depend on needs_swap
+		self._palettes = {}
+		# any clip is for the old size
+		self._clip_stack = []
+		self._set_clip(0, 0, self.width, self.height)
 
 		if self.color_order == BGR:
 			madctl |= _ST7789_MADCTL_BGR
@@ -433,16 +476,162 @@ class ST7789:
 			y1 (int): row end address
 		"""
 		if x0 <= x1 <= self.width and y0 <= y1 <= self.height:
-			self._write(
-				_ST7789_CASET,
-				struct.pack(_ENCODE_POS, x0 + self.xstart, x1 + self.xstart),
-			)
-			self._write(
-				_ST7789_RASET,
-				struct.pack(_ENCODE_POS, y0 + self.ystart, y1 + self.ystart),
-			)
+			struct.pack_into(_ENCODE_POS, self._window, 0, x0 + self.xstart, x1 + self.xstart)
+			self._write(_ST7789_CASET, self._window)
+			struct.pack_into(_ENCODE_POS, self._window, 0, y0 + self.ystart, y1 + self.ystart)
+			self._write(_ST7789_RASET, self._window)
 			self._write(_ST7789_RAMWR)
 
+	@staticmethod
+	def _view(buffer, views, length):
+		"""
+		Get a memoryview of the first 'length' bytes of one of the transfer buffers.
+
+		The views are kept, so that writing the same lengths again doesn't allocate.
+
+		Args:
+			buffer (bytearray): a transfer buffer owned by the driver
+			views (dict): the views already made for that buffer
+			length (int): number of bytes
+		"""
+		view = views.get(length)
+		if view is None:
+			view = memoryview(buffer)[:length]
+			views[length] = view
+		return view
+
+	def _scratch_view(self, length):
+		"""
+		Get 'length' bytes of the scratch buffer, growing it if needed.
+
+		Args:
+			length (int): number of bytes
+		"""
+		if length > len(self._scratch):
+			self._scratch = bytearray(length)
+			self._scratch_views = {}
+		return self._view(self._scratch, self._scratch_views, length)
+
+	@micropython.viper
+	@staticmethod
+	def _fill_pixels(buffer, length: int, value: int):
+		"""
+		Fill a buffer with one 2 byte value.
+
+		Args:
+			buffer (bytearray): destination, must hold length * 2 bytes
+			length (int): number of pixels
+			value (int): the pixel, already in the byte order the display expects
+		"""
+		dst = ptr16(buffer)
+		for i in range(length):
+			dst[i] = value
+
+	def _write_fill(self, count, color):
+		"""
+		Write 'count' pixels of one color to the current window.
+
+		Args:
+			count (int): number of pixels
+			color (int): 565 encoded color
+		"""
+		value = color if self.needs_swap else ((color << 8) & 0xFF00) | (color >> 8)
+		if value != self._fill_value:
+			self._fill_pixels(self._fill_buffer, _BUFFER_SIZE, value)
+			self._fill_value = value
+
+		for _ in range(count // _BUFFER_SIZE):
+			self._write(None, self._fill_buffer)
+		rest = count % _BUFFER_SIZE
+		if rest:
+			self._write(None, self._view(self._fill_buffer, self._fill_views, rest * 2))
+
+	def push_clip(self, x, y, width, height):
+		"""
+		Limit all drawing to a rectangle, until pop_clip() is called.
+
+		Clips can be nested, each new clip is limited to the clip before it.
+		Anything completely outside of the clip is skipped without writing to the display,
+		and only the visible part of anything partly inside is sent.
+
+		Args:
+			x (int): Top left corner x coordinate
+			y (int): Top left corner y coordinate
+			width (int): Width in pixels
+			height (int): Height in pixels
+		"""
+		self._clip_stack.append((self._clip_x0, self._clip_y0, self._clip_x1, self._clip_y1))
+		self._set_clip(
+			max(x, self._clip_x0),
+			max(y, self._clip_y0),
+			min(x + width, self._clip_x1),
+			min(y + height, self._clip_y1),
+		)
+
+	def pop_clip(self):
+		"""Remove the last clip set with push_clip(), going back to the one before it."""
+		if self._clip_stack:
+			self._set_clip(*self._clip_stack.pop())
+
+	def get_clip(self):
+		"""
+		Get the current clip, as set with push_clip().
+
+		Returns:
+			tuple: (x, y, width, height), the whole display when there is no clip
+		"""
+		return (
+			self._clip_x0, self._clip_y0,
+			self._clip_x1 - self._clip_x0, self._clip_y1 - self._clip_y0,
+			)
+
+	def _set_clip(self, x0, y0, x1, y1):
+		"""Set the clip bounds. (x1, y1 are exclusive)"""
+		self._clip_x0 = x0
+		self._clip_y0 = y0
+		self._clip_x1 = max(x0, x1)
+		self._clip_y1 = max(y0, y1)
+
+	def _clipped(self, x, y, width, height):
+		"""Check if an area is completely outside of the clip."""
+		return (
+			x >= self._clip_x1 or y >= self._clip_y1
+			or x + width <= self._clip_x0 or y + height <= self._clip_y0
+		)
+
+	def _blit(self, buffer, x, y, width, height):
+		"""
+		Write a buffer of 565 encoded pixels to the display, clipped.
+
+		Args:
+			buffer (bytes): width * height pixels, in the byte order the display expects
+			x (int): Top left corner x coordinate
+			y (int): Top left corner y coordinate
+			width (int): Width
+			height (int): Height
+		"""
+		x0 = max(x, self._clip_x0)
+		y0 = max(y, self._clip_y0)
+		x1 = min(x + width, self._clip_x1)
+		y1 = min(y + height, self._clip_y1)
+		if x0 >= x1 or y0 >= y1:
+			return
+		self._set_window(x0, y0, x1 - 1, y1 - 1)
+		if x0 == x and x1 == x + width:
+			if y0 == y and y1 == y + height:
+				self._write(None, buffer)
+			else:
+				# whole rows are still contiguous
+				start = (y0 - y) * width * 2
+				self._write(None, memoryview(buffer)[start:start + (y1 - y0) * width * 2])
+			return
+		buffer = memoryview(buffer)
+		row_len = (x1 - x0) * 2
+		start = ((y0 - y) * width + (x0 - x)) * 2
+		for _ in range(y1 - y0):
+			self._write(None, buffer[start:start + row_len])
+			start += width * 2
+
 	def vline(self, x, y, length, color):
 		"""
 		Draw vertical line at the given location and color.
@@ -476,13 +665,13 @@ class ST7789:
 			Y (int): y coordinate
 			color (int): 565 encoded color
 		"""
+		if not (self._clip_x0 <= x < self._clip_x1 and self._clip_y0 <= y < self._clip_y1):
+			return
 		self._set_window(x, y, x, y)
-		self._write(
-			None,
-			struct.pack(
-				_ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL, color
-			),
+		struct.pack_into(
+			_ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL, self._pixel, 0, color
 		)
+		self._write(None, self._pixel)
 
 	def blit_buffer(self, buffer, x, y, width, height):
 		"""
@@ -495,8 +684,7 @@ class ST7789:
 			width (int): Width
 			height (int): Height
 		"""
-		self._set_window(x, y, x + width - 1, y + height - 1)
-		self._write(None, buffer)
+		self._blit(buffer, x, y, width, height)
 
 	def rect(self, x, y, w, h, color):
 		"""
@@ -509,6 +697,8 @@ class ST7789:
 			height (int): Height in pixels
 			color (int): 565 encoded color
 		"""
+		if self._clipped(x, y, w, h):
+			return
 		self.hline(x, y, w, color)
 		self.vline(x, y, h, color)
 		self.vline(x + w - 1, y, h, color)
@@ -525,60 +715,119 @@ class ST7789:
 			height (int): Height in pixels
 			color (int): 565 encoded color
 		"""
-		self._set_window(x, y, x + width - 1, y + height - 1)
-		chunks, rest = divmod(width * height, _BUFFER_SIZE)
-		pixel = struct.pack(
-			_ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL, color
-		)
-		self.dc.on()
-		if chunks:
-			data = pixel * _BUFFER_SIZE
-			for _ in range(chunks):
-				self._write(None, data)
-		if rest:
-			self._write(None, pixel * rest)
+		x0 = max(x, self._clip_x0)
+		y0 = max(y, self._clip_y0)
+		x1 = min(x + width, self._clip_x1)
+		y1 = min(y + height, self._clip_y1)
+		if x0 >= x1 or y0 >= y1:
+			return
+		self._set_window(x0, y0, x1 - 1, y1 - 1)
+		self._write_fill((x1 - x0) * (y1 - y0), color)
 
 	def fill(self, color):
 		"""
-		Fill the entire FrameBuffer with the specified color.
+		Fill the entire display with the specified color.
+		While a clip is set (see push_clip), only the clip is filled.
 
 		Args:
 			color (int): 565 encoded color
 		"""
 		self.fill_rect(0, 0, self.width, self.height, color)
 
-	def line(self, x0, y0, x1, y1, color):
+	@micropython.viper
+	@staticmethod
+	def _line_runs(x0: int, y0: int, x1: int, y1: int, runs) -> int:
 		"""
-		Draw a single pixel wide line starting at x0, y0 and ending at x1, y1.
+		Walk a Bresenham line, and store every straight run of pixels in it.
+
+		Shallow lines are split into horizontal runs, and steep lines into vertical runs.
 
 		Args:
 			x0 (int): Start point x coordinate
 			y0 (int): Start point y coordinate
 			x1 (int): End point x coordinate
 			y1 (int): End point y coordinate
-			color (int): 565 encoded color
+			runs (array): destination, 3 values per run (x, y, length);
+				must hold 3 * (longest side of the line + 1) values
+
+		Returns:
+			int: number of runs
 		"""
-		steep = abs(y1 - y0) > abs(x1 - x0)
-		if steep:
+		out = ptr16(runs)
+		steep = 0
+		if (y1 - y0 if y1 > y0 else y0 - y1) > (x1 - x0 if x1 > x0 else x0 - x1):
+			steep = 1
 			x0, y0 = y0, x0
 			x1, y1 = y1, x1
 		if x0 > x1:
 			x0, x1 = x1, x0
 			y0, y1 = y1, y0
 		dx = x1 - x0
-		dy = abs(y1 - y0)
-		err = dx // 2
+		dy = y1 - y0 if y1 > y0 else y0 - y1
+		err = dx >> 1
 		ystep = 1 if y0 < y1 else -1
+
+		count = 0
+		run_start = x0
 		while x0 <= x1:
-			if steep:
-				self.pixel(y0, x0, color)
-			else:
-				self.pixel(x0, y0, color)
 			err -= dy
+			if err < 0 or x0 == x1:
+				# the run ends at this pixel
+				idx = count * 3
+				if steep:
+					out[idx] = y0
+					out[idx + 1] = run_start
+				else:
+					out[idx] = run_start
+					out[idx + 1] = y0
+				out[idx + 2] = x0 - run_start + 1
+				count += 1
+				run_start = x0 + 1
 			if err < 0:
 				y0 += ystep
 				err += dx
 			x0 += 1
+		return count
+
+	def line(self, x0, y0, x1, y1, color):
+		"""
+		Draw a single pixel wide line starting at x0, y0 and ending at x1, y1.
+
+		Horizontal and vertical runs of pixels are each sent as one window,
+		so lines close to horizontal or vertical need very few writes.
+
+		Args:
+			x0 (int): Start point x coordinate
+			y0 (int): Start point y coordinate
+			x1 (int): End point x coordinate
+			y1 (int): End point y coordinate
+			color (int): 565 encoded color
+		"""
+		if self._clipped(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1):
+			return
+		runs = self._runs
+		length = max(abs(x1 - x0), abs(y1 - y0)) + 1
+		if length * 3 > len(runs):
+			runs = array("h", bytes(6 * length))
+		count = self._line_runs(x0, y0, x1, y1, runs)
+
+		if abs(y1 - y0) > abs(x1 - x0):
+			for i in range(0, count * 3, 3):
+				self._vspan(runs[i], runs[i + 1], runs[i + 1] + runs[i + 2] - 1, color)
+		else:
+			for i in range(0, count * 3, 3):
+				self._span(runs[i], runs[i] + runs[i + 2] - 1, runs[i + 1], color)
+
+	def lines(self, points, color):
+		"""
+		Draw connected lines through a list of points.
+
+		Args:
+			points (list): List of (x, y) points; a line is drawn between each point and the next
+			color (int): 565 encoded color
+		"""
+		for i in range(1, len(points)):
+			self.line(points[i - 1][0], points[i - 1][1], points[i][0], points[i][1], color)
 
 	def vscrdef(self, tfa, vsa, bfa):
 		"""
@@ -618,12 +867,20 @@ class ST7789:
 
 	@micropython.viper
 	@staticmethod
-	def _pack8(glyphs, idx: uint, fg_color: uint, bg_color: uint):
-		buffer = bytearray(128)
+	def _pack_glyph(glyphs, idx: uint, buffer, num_bytes: uint, fg_color: uint, bg_color: uint):
+		"""
+		Expand 1-bit font data into 565 encoded colors.
+
+		Args:
+			glyphs (memoryview): font data, 8 pixels per byte (MSB first)
+			idx (int): index of the first byte to expand
+			buffer (bytearray): where to put the colors; must hold num_bytes * 16 bytes
+			num_bytes (int): number of font bytes to expand
+		"""
 		bitmap = ptr16(buffer)
 		glyph = ptr8(glyphs)
 
-		for i in range(0, 64, 8):
+		for i in range(0, num_bytes * 8, 8):
 			byte = glyph[idx]
 			bitmap[i] = fg_color if byte & _BIT7 else bg_color
 			bitmap[i + 1] = fg_color if byte & _BIT6 else bg_color
@@ -635,56 +892,79 @@ class ST7789:
 			bitmap[i + 7] = fg_color if byte & _BIT0 else bg_color
 			idx += 1
 
-		return buffer
+	def _glyph(self, font, page, ch, fg_color, bg_color):
+		"""
+		Get the 565 encoded buffer for a character, from the glyph cache if possible.
+		"""
+		glyph = self.glyph_cache.get(page, ch)
+		if glyph is None:
+			num_bytes = (font.WIDTH * font.HEIGHT) // 8
+			glyph = bytearray(num_bytes * 16)
+			self._pack_glyph(font.FONT, (ch - font.FIRST) * num_bytes, glyph, num_bytes, fg_color, bg_color)
+			self.glyph_cache.put(page, ch, glyph, len(glyph))
+		return glyph
 
 	@micropython.viper
 	@staticmethod
-	def _pack16(glyphs, idx: uint, fg_color: uint, bg_color: uint):
+	def _copy_glyph(glyph, band, band_width: int, x: int, width: int, height: int):
 		"""
-		Pack a character into a byte array.
+		Copy a glyph into a band of text.
 
 		Args:
-			char (str): character to pack
-
-		Returns:
-			128 bytes: character bitmap in color565 format
+			glyph (bytearray): 565 encoded glyph, width * height pixels
+			band (memoryview): destination, band_width * height pixels
+			band_width (int): width of the band in pixels
+			x (int): column of the band to copy the glyph to
+			width (int): width of the glyph in pixels
+			height (int): height of the glyph in pixels
 		"""
+		src = ptr16(glyph)
+		dst = ptr16(band)
+		i = 0
+		for row in range(height):
+			start = row * band_width + x
+			for col in range(width):
+				dst[start + col] = src[i]
+				i += 1
 
-		buffer = bytearray(256)
-		bitmap = ptr16(buffer)
-		glyph = ptr8(glyphs)
-
-		for i in range(0, 128, 16):
-			byte = glyph[idx]
-
-			bitmap[i] = fg_color if byte & _BIT7 else bg_color
-			bitmap[i + 1] = fg_color if byte & _BIT6 else bg_color
-			bitmap[i + 2] = fg_color if byte & _BIT5 else bg_color
-			bitmap[i + 3] = fg_color if byte & _BIT4 else bg_color
-			bitmap[i + 4] = fg_color if byte & _BIT3 else bg_color
-			bitmap[i + 5] = fg_color if byte & _BIT2 else bg_color
-			bitmap[i + 6] = fg_color if byte & _BIT1 else bg_color
-			bitmap[i + 7] = fg_color if byte & _BIT0 else bg_color
-			idx += 1
-
-			byte = glyph[idx]
-			bitmap[i + 8] = fg_color if byte & _BIT7 else bg_color
-			bitmap[i + 9] = fg_color if byte & _BIT6 else bg_color
-			bitmap[i + 10] = fg_color if byte & _BIT5 else bg_color
-			bitmap[i + 11] = fg_color if byte & _BIT4 else bg_color
-			bitmap[i + 12] = fg_color if byte & _BIT3 else bg_color
-			bitmap[i + 13] = fg_color if byte & _BIT2 else bg_color
-			bitmap[i + 14] = fg_color if byte & _BIT1 else bg_color
-			bitmap[i + 15] = fg_color if byte & _BIT0 else bg_color
-			idx += 1
+	def _text_band(self, font, page, text, start, end, count, x0, y0, fg_color, bg_color):
+		"""
+		Draw the characters text[start:end] that are in the font, as a single window.
 
-		return buffer
+		Args:
+			font (module): font module to use
+			page (int): glyph cache page for the font and colors
+			text (str): text to draw from
+			start (int): index of the first character
+			end (int): index after the last character
+			count (int): number of characters in the font, between start and end
+			x0 (int): column to start drawing at
+			y0 (int): row to start drawing at
+			fg_color (int): 565 encoded color to use for characters
+			bg_color (int): 565 encoded color to use for background
+		"""
+		width = font.WIDTH
+		band_width = count * width
+		if self._clipped(x0, y0, band_width, font.HEIGHT):
+			return
+		band = self._scratch_view(band_width * font.HEIGHT * 2)
+		x = 0
+		for i in range(start, end):
+			ch = ord(text[i])
+			if font.FIRST <= ch < font.LAST:
+				glyph = self._glyph(font, page, ch, fg_color, bg_color)
+				self._copy_glyph(glyph, band, band_width, x, width, font.HEIGHT)
+				x += width
+		self._blit(band, x0, y0, band_width, font.HEIGHT)
 
 	def _text8(self, font, text, x0, y0, fg_color=WHITE, bg_color=BLACK):
 		"""
 		Internal method to write characters with width of 8 and
 		heights of 8 or 16.
 
+		Characters are composed into bands, so a whole line of text is sent
+		with one window. Characters that aren't in the font are skipped.
+
 		Args:
 			font (module): font module to use
 			text (str): text to write
@@ -693,35 +973,34 @@ class ST7789:
 			color (int): 565 encoded color to use for characters
 			background (int): 565 encoded color to use for background
 		"""
-
-		for char in text:
-			ch = ord(char)
-			if (
-				font.FIRST <= ch < font.LAST
-				and x0 + font.WIDTH <= self.width
-				and y0 + font.HEIGHT <= self.height
-			):
-				if font.HEIGHT == 8:
-					passes = 1
-					size = 8
-					each = 0
-				else:
-					passes = 2
-					size = 16
-					each = 8
-
-				for line in range(passes):
-					idx = (ch - font.FIRST) * size + (each * line)
-					buffer = self._pack8(font.FONT, idx, fg_color, bg_color)
-					self.blit_buffer(buffer, x0, y0 + 8 * line, 8, 8)
-
-				x0 += 8
+		if y0 + font.HEIGHT > self.height:
+			return
+		page = self.glyph_cache.page(font, fg_color, bg_color)
+		max_chars = max(1, _TEXT_BAND_SIZE // (font.WIDTH * font.HEIGHT * 2))
+		start = end = count = 0
+		for i in range(len(text)):
+			ch = ord(text[i])
+			if font.FIRST <= ch < font.LAST:
+				if x0 + (count + 1) * 8 > self.width:
+					break
+				count += 1
+				end = i + 1
+				if count == max_chars:
+					self._text_band(font, page, text, start, end, count, x0, y0, fg_color, bg_color)
+					x0 += count * 8
+					start = end
+					count = 0
+		if count:
+			self._text_band(font, page, text, start, end, count, x0, y0, fg_color, bg_color)
 
 	def _text16(self, font, text, x0, y0, fg_color=WHITE, bg_color=BLACK):
 		"""
 		Internal method to draw characters with width of 16 and heights of 16
 		or 32.
 
+		Characters are composed into bands, so a whole line of text is sent
+		with one window. Characters that aren't in the font leave a gap.
+
 		Args:
 			font (module): font module to use
 			text (str): text to write
@@ -730,27 +1009,34 @@ class ST7789:
 			color (int): 565 encoded color to use for characters
 			background (int): 565 encoded color to use for background
 		"""
-
-		for char in text:
-			ch = ord(char)
-			if (
-				font.FIRST <= ch < font.LAST
-				and x0 + font.WIDTH <= self.width
-				and y0 + font.HEIGHT <= self.height
-			):
-				each = 16
-				if font.HEIGHT == 16:
-					passes = 2
-					size = 32
-				else:
-					passes = 4
-					size = 64
-
-				for line in range(passes):
-					idx = (ch - font.FIRST) * size + (each * line)
-					buffer = self._pack16(font.FONT, idx, fg_color, bg_color)
-					self.blit_buffer(buffer, x0, y0 + 8 * line, 16, 8)
-			x0 += 16
+		if y0 + font.HEIGHT > self.height:
+			return
+		page = self.glyph_cache.page(font, fg_color, bg_color)
+		max_chars = max(1, _TEXT_BAND_SIZE // (font.WIDTH * font.HEIGHT * 2))
+		start = end = count = 0
+		for i in range(len(text)):
+			ch = ord(text[i])
+			if x0 + (count + 1) * 16 > self.width:
+				break
+			if font.FIRST <= ch < font.LAST:
+				count += 1
+				end = i + 1
+				if count < max_chars:
+					continue
+			elif not count:
+				# a gap, with nothing to draw before it
+				x0 += 16
+				start = i + 1
+				continue
+			self._text_band(font, page, text, start, end, count, x0, y0, fg_color, bg_color)
+			x0 += count * 16
+			if end == i:
+				# this character is the gap after the band
+				x0 += 16
+			start = i + 1
+			count = 0
+		if count:
+			self._text_band(font, page, text, start, end, count, x0, y0, fg_color, bg_color)
 
 	def text(self, font, text, x0, y0, color=WHITE, background=BLACK):
 		"""
@@ -765,6 +1051,8 @@ class ST7789:
 			color (int): 565 encoded color to use for characters
 			background (int): 565 encoded color to use for background
 		"""
+		if self._clipped(x0, y0, len(text) * font.WIDTH, font.HEIGHT):
+			return
 		fg_color = color if self.needs_swap else ((color << 8) & 0xFF00) | (color >> 8)
 		bg_color = (
 			background
@@ -777,6 +1065,59 @@ class ST7789:
 		else:
 			self._text16(font, text, x0, y0, fg_color, bg_color)
 
+	@micropython.viper
+	@staticmethod
+	def _expand_bitmap(bitmap, bs_bit: int, palette, buffer, length: int, bpp: int):
+		"""
+		Expand palette indexes from a bitmap's bitstream into display ready 565 colors.
+
+		Args:
+			bitmap (memoryview): bitmap data, bpp bits per pixel (MSB first)
+			bs_bit (int): bit offset of the first pixel
+			palette (bytearray): display ready colors, 2 bytes each (see _palette)
+			buffer (bytearray): destination, must hold length * 2 bytes
+			length (int): number of pixels to expand
+			bpp (int): bits per pixel
+		"""
+		src = ptr8(bitmap)
+		lut = ptr16(palette)
+		dst = ptr16(buffer)
+
+		if bpp == 8 and (bs_bit & 7) == 0:
+			# one byte per pixel, it's just a lookup
+			start = bs_bit >> 3
+			for i in range(length):
+				dst[i] = lut[src[start + i]]
+		else:
+			for i in range(length):
+				color_index = 0
+				for _ in range(bpp):
+					color_index = (color_index << 1) | ((src[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1)
+					bs_bit += 1
+				dst[i] = lut[color_index]
+
+	def _palette(self, key, colors, bpp):
+		"""
+		Get a bitmap palette, encoded the way the display wants it.
+		Palettes are made once per key, and the given colors are never modified.
+
+		Args:
+			key: the bitmap module, or the palette tuple itself
+			colors (list): 565 encoded colors
+			bpp (int): bits per pixel of the bitmap
+		"""
+		size = 1 << bpp
+		palette = self._palettes.get(key)
+		if palette is None or len(palette) < size * 2:
+			if len(self._palettes) >= _MAX_PALETTES:
+				self._palettes = {}
+			encoding = _ENCODE_PIXEL_SWAPPED if self.needs_swap else _ENCODE_PIXEL
+			palette = bytearray(size * 2)
+			for i in range(size):
+				struct.pack_into(encoding, palette, i * 2, colors[i] if i < len(colors) else colors[-1])
+			self._palettes[key] = palette
+		return palette
+
 	def bitmap(self, bitmap, x, y, index=0):
 		"""
 		Draw a bitmap on display at the specified column and row
@@ -792,35 +1133,17 @@ class ST7789:
 		height = bitmap.HEIGHT
 		to_col = x + width - 1
 		to_row = y + height - 1
-		if self.width <= to_col or self.height <= to_row:
+		if self.width <= to_col or self.height <= to_row or self._clipped(x, y, width, height):
 			return
 
 		bitmap_size = height * width
-		buffer_len = bitmap_size * 2
 		bpp = bitmap.BPP
 		bs_bit = bpp * bitmap_size * index  # if index > 0 else 0
-		palette = bitmap.PALETTE
-		needs_swap = self.needs_swap
-		buffer = bytearray(buffer_len)
-
-		for i in range(0, buffer_len, 2):
-			color_index = 0
-			for _ in range(bpp):
-				color_index = (color_index << 1) | (
-					(bitmap.BITMAP[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1
-				)
-				bs_bit += 1
-
-			color = palette[color_index]
-			if needs_swap:
-				buffer[i] = color & 0xFF
-				buffer[i + 1] = color >> 8
-			else:
-				buffer[i] = color >> 8
-				buffer[i + 1] = color & 0xFF
+		palette = self._palette(bitmap, bitmap.PALETTE, bpp)
+		buffer = bytearray(bitmap_size * 2)
+		self._expand_bitmap(bitmap.BITMAP, bs_bit, palette, buffer, bitmap_size, bpp)
 
-		self._set_window(x, y, to_col, to_row)
-		self._write(None, buffer)
+		self._blit(buffer, x, y, width, height)
 
 	def bitmap_icons(self, bitmap_module, bitmap, palette, x, y):
 		"""
@@ -839,34 +1162,16 @@ class ST7789:
 		height = bitmap_module.HEIGHT
 		to_col = x + width - 1
 		to_row = y + height - 1
-		if self.width <= to_col or self.height <= to_row:
+		if self.width <= to_col or self.height <= to_row or self._clipped(x, y, width, height):
 			return
 
 		bitmap_size = height * width
-		buffer_len = bitmap_size * 2
 		bpp = bitmap_module.BPP
-		bs_bit = 0
-		needs_swap = self.needs_swap
-		buffer = bytearray(buffer_len)
-
-		for i in range(0, buffer_len, 2):
-			color_index = 0
-			for _ in range(bpp):
-				color_index = (color_index << 1) | (
-					(bitmap[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1
-				)
-				bs_bit += 1
-
-			color = palette[color_index]
-			if needs_swap:
-				buffer[i] = color & 0xFF
-				buffer[i + 1] = color >> 8
-			else:
-				buffer[i] = color >> 8
-				buffer[i + 1] = color & 0xFF
+		palette = tuple(palette)
+		buffer = bytearray(bitmap_size * 2)
+		self._expand_bitmap(bitmap, 0, self._palette(palette, palette, bpp), buffer, bitmap_size, bpp)
 
-		self._set_window(x, y, to_col, to_row)
-		self._write(None, buffer)
+		self._blit(buffer, x, y, width, height)
 
 	def pbitmap(self, bitmap, x, y, index=0):
 		"""
@@ -882,44 +1187,94 @@ class ST7789:
 		"""
 		width = bitmap.WIDTH
 		height = bitmap.HEIGHT
+		if self._clipped(x, y, width, height):
+			return
 		bitmap_size = height * width
 		bpp = bitmap.BPP
 		bs_bit = bpp * bitmap_size * index  # if index > 0 else 0
-		palette = bitmap.PALETTE
-		needs_swap = self.needs_swap
-		buffer = bytearray(bitmap.WIDTH * 2)
+		palette = self._palette(bitmap, bitmap.PALETTE, bpp)
+		buffer = bytearray(width * 2)
+		to_col = x + width - 1
 
 		for row in range(height):
-			for col in range(width):
-				color_index = 0
-				for _ in range(bpp):
-					color_index <<= 1
-					color_index |= (
-						bitmap.BITMAP[bs_bit // 8] & 1 << (7 - (bs_bit % 8))
-					) > 0
-					bs_bit += 1
-				color = palette[color_index]
-				if needs_swap:
-					buffer[col * 2] = color & 0xFF
-					buffer[col * 2 + 1] = color >> 8 & 0xFF
-				else:
-					buffer[col * 2] = color >> 8 & 0xFF
-					buffer[col * 2 + 1] = color & 0xFF
-
-			to_col = x + width - 1
 			to_row = y + row
 			if self.width > to_col and self.height > to_row:
-				self._set_window(x, y + row, to_col, to_row)
-				self._write(None, buffer)
+				self._expand_bitmap(bitmap.BITMAP, bs_bit, palette, buffer, width, bpp)
+				self._blit(buffer, x, to_row, width, 1)
+			bs_bit += width * bpp
 				
 				
 
 			
+	@micropython.viper
+	@staticmethod
+	def _expand_glyph(bitmap, bs_bit: int, palette, band, band_width: int, x: int, width: int, height: int):
+		"""
+		Expand a 1 bit per pixel glyph from a converted true-type font into a band of text.
+
+		Args:
+			bitmap (memoryview): font bitmaps, 1 bit per pixel (MSB first)
+			bs_bit (int): bit offset of the glyph
+			palette (bytearray): background and foreground colors, 2 bytes each
+			band (memoryview): destination, band_width * height pixels
+			band_width (int): width of the band in pixels
+			x (int): column of the band to expand the glyph to
+			width (int): width of the glyph in pixels
+			height (int): height of the glyph in pixels
+		"""
+		src = ptr8(bitmap)
+		lut = ptr16(palette)
+		dst = ptr16(band)
+		for row in range(height):
+			start = row * band_width + x
+			for col in range(width):
+				dst[start + col] = lut[(src[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1]
+				bs_bit += 1
+
+	def _write_band(self, font, string, start, end, band_width, x, y):
+		"""
+		Draw the characters string[start:end] that are in the font, as a single window.
+
+		Args:
+			font (font): The module containing the converted true-type font
+			string (string): The string to draw from
+			start (int): index of the first character
+			end (int): index after the last character
+			band_width (int): width of those characters in pixels
+			x (int): column to start writing
+			y (int): row to start writing
+		"""
+		height = font.HEIGHT
+		if self._clipped(x, y, band_width, height):
+			return
+		band = self._scratch_view(band_width * height * 2)
+		col = 0
+		for i in range(start, end):
+			char_index = font.MAP.find(string[i])
+			if char_index < 0:
+				continue
+			offset = char_index * font.OFFSET_WIDTH
+			bs_bit = font.OFFSETS[offset]
+			if font.OFFSET_WIDTH > 1:
+				bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 1]
+
+			if font.OFFSET_WIDTH > 2:
+				bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 2]
+
+			char_width = font.WIDTHS[char_index]
+			self._expand_glyph(font.BITMAPS, bs_bit, self._write_palette, band, band_width, col, char_width, height)
+			col += char_width
+
+		self._blit(band, x, y, band_width, height)
+
 	def write(self, font, string, x, y, fg=WHITE, bg=BLACK):
 		"""
 		Write a string using a converted true-type font on the display starting
 		at the specified column and row
 
+		Characters are composed into bands, so a whole line of text is sent
+		with one window.
+
 		Args:
 			font (font): The module containing the converted true-type font
 			s (string): The string to write
@@ -928,48 +1283,31 @@ class ST7789:
 			fg (int): foreground color, optional, defaults to WHITE
 			bg (int): background color, optional, defaults to BLACK
 		"""
-		buffer_len = font.HEIGHT * font.MAX_WIDTH * 2
-		buffer = bytearray(buffer_len)
-		fg_hi = fg >> 8
-		fg_lo = fg & 0xFF
-
-		bg_hi = bg >> 8
-		bg_lo = bg & 0xFF
-
-		for character in string:
-			try:
-				char_index = font.MAP.index(character)
-				offset = char_index * font.OFFSET_WIDTH
-				bs_bit = font.OFFSETS[offset]
-				if font.OFFSET_WIDTH > 1:
-					bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 1]
-
-				if font.OFFSET_WIDTH > 2:
-					bs_bit = (bs_bit << 8) + font.OFFSETS[offset + 2]
-
-				char_width = font.WIDTHS[char_index]
-				buffer_needed = char_width * font.HEIGHT * 2
-
-				for i in range(0, buffer_needed, 2):
-					if font.BITMAPS[bs_bit // 8] & 1 << (7 - (bs_bit % 8)) > 0:
-						buffer[i] = fg_hi
-						buffer[i + 1] = fg_lo
-					else:
-						buffer[i] = bg_hi
-						buffer[i + 1] = bg_lo
-
-					bs_bit += 1
-
-				to_col = x + char_width - 1
-				to_row = y + font.HEIGHT - 1
-				if self.width > to_col and self.height > to_row:
-					self._set_window(x, y, to_col, to_row)
-					self._write(None, buffer[:buffer_needed])
+		if y + font.HEIGHT > self.height or self._clipped(0, y, self.width, font.HEIGHT):
+			return
 
-				x += char_width
-
-			except ValueError:
-				pass
+		# 1 bit per pixel palette: background, then foreground
+		struct.pack_into(">HH", self._write_palette, 0, bg, fg)
+
+		max_width = max(font.MAX_WIDTH, _TEXT_BAND_SIZE // (font.HEIGHT * 2))
+		start = end = band_width = 0
+		for i in range(len(string)):
+			char_index = font.MAP.find(string[i])
+			if char_index < 0:
+				continue
+			char_width = font.WIDTHS[char_index]
+			if x + band_width + char_width > self.width:
+				break
+			if band_width + char_width > max_width:
+				self._write_band(font, string, start, end, band_width, x, y)
+				x += band_width
+				start = end
+				band_width = 0
+			band_width += char_width
+			end = i + 1
+
+		if band_width:
+			self._write_band(font, string, start, end, band_width, x, y)
 
 	def write_width(self, font, string):
 		"""
@@ -994,8 +1332,30 @@ class ST7789:
 
 		return width
 
+	def _polygon_points(self, points, x, y, angle, center_x, center_y):
+		"""Return the points of a polygon as a list of (x, y) tuples, rotated and moved to x, y."""
+		if angle:
+			cos_a = cos(angle)
+			sin_a = sin(angle)
+			return [
+				(
+					x
+					+ center_x
+					+ int(
+						(point[0] - center_x) * cos_a - (point[1] - center_y) * sin_a
+					),
+					y
+					+ center_y
+					+ int(
+						(point[0] - center_x) * sin_a + (point[1] - center_y) * cos_a
+					),
+				)
+				for point in points
+			]
+		return [(x + int((point[0])), y + int((point[1]))) for point in points]
+
 	@micropython.native
-	def polygon(self, points, x, y, color, angle=0, center_x=0, center_y=0):
+	def polygon(self, points, x, y, color, angle=0, center_x=0, center_y=0, fill=False):
 		"""
 		Draw a polygon on the display.
 
@@ -1007,6 +1367,7 @@ class ST7789:
 			angle (float): Rotation angle in radians (default: 0).
 			center_x (int): X-coordinate of the rotation center (default: 0).
 			center_y (int): Y-coordinate of the rotation center (default: 0).
+			fill (bool): Fill the polygon using fill_polygon (default: False).
 
 		Raises:
 			ValueError: If the polygon has less than 3 points.
@@ -1014,32 +1375,185 @@ class ST7789:
 		if len(points) < 3:
 			raise ValueError("Polygon must have at least 3 points.")
 
-		if angle:
-			cos_a = cos(angle)
-			sin_a = sin(angle)
-			rotated = [
-				(
-					x
-					+ center_x
-					+ int(
-						(point[0] - center_x) * cos_a - (point[1] - center_y) * sin_a
-					),
-					y
-					+ center_y
-					+ int(
-						(point[0] - center_x) * sin_a + (point[1] - center_y) * cos_a
-					),
-				)
-				for point in points
-			]
-		else:
-			rotated = [(x + int((point[0])), y + int((point[1]))) for point in points]
-
-		for i in range(1, len(rotated)):
-			self.line(
-				rotated[i - 1][0],
-				rotated[i - 1][1],
-				rotated[i][0],
-				rotated[i][1],
-				color,
-			)
+		if fill:
+			self.fill_polygon(points, x, y, color, angle, center_x, center_y)
+			return
+
+		self.lines(self._polygon_points(points, x, y, angle, center_x, center_y), color)
+
+	@micropython.native
+	def fill_polygon(self, points, x, y, color, angle=0, center_x=0, center_y=0):
+		"""
+		Draw a filled polygon on the display.
+
+		The polygon is filled one row at a time, using an active edge table,
+		and every span is sent to the display as a single window write.
+		The polygon is closed automatically, and is filled using the even-odd rule,
+		with the same edge rules as framebuf.FrameBuffer.poly().
+
+		Args:
+			points (list): List of points of the polygon.
+			x (int): X-coordinate of the polygon's position.
+			y (int): Y-coordinate of the polygon's position.
+			color (int): 565 encoded color.
+			angle (float): Rotation angle in radians (default: 0).
+			center_x (int): X-coordinate of the rotation center (default: 0).
+			center_y (int): Y-coordinate of the rotation center (default: 0).
+
+		Raises:
+			ValueError: If the polygon has less than 3 points.
+		"""
+		if len(points) < 3:
+			raise ValueError("Polygon must have at least 3 points.")
+
+		rotated = self._polygon_points(points, x, y, angle, center_x, center_y)
+
+		# edge table: (top y, bottom y, top x, bottom x) for each edge that isn't horizontal,
+		# sorted by the top row. 'caps' are the pixels the half-open edges miss:
+		# the bottom end of each edge, and horizontal edges.
+		edges = []
+		caps = []
+		x_min = x_max = rotated[0][0]
+		y_min = y_max = rotated[0][1]
+		prev_x, prev_y = rotated[-1]
+		for point_x, point_y in rotated:
+			if point_y < prev_y:
+				edges.append((point_y, prev_y, point_x, prev_x))
+				caps.append((prev_y, prev_x, prev_x))
+			elif point_y > prev_y:
+				edges.append((prev_y, point_y, prev_x, point_x))
+				caps.append((point_y, point_x, point_x))
+			else:
+				caps.append((point_y, min(point_x, prev_x), max(point_x, prev_x)))
+			x_min = min(x_min, point_x)
+			x_max = max(x_max, point_x)
+			y_min = min(y_min, point_y)
+			y_max = max(y_max, point_y)
+			prev_x, prev_y = point_x, point_y
+		edges.sort()
+		caps.sort()
+
+		if self._clipped(x_min, y_min, x_max - x_min + 1, y_max - y_min + 1):
+			return
+
+		active = []
+		nodes = []
+		next_edge = 0
+		next_cap = 0
+		num_edges = len(edges)
+		num_caps = len(caps)
+		for row in range(max(y_min, self._clip_y0), min(y_max, self._clip_y1 - 1) + 1):
+			# update the active edge table
+			while next_edge < num_edges and edges[next_edge][0] <= row:
+				active.append(edges[next_edge])
+				next_edge += 1
+			active = [edge for edge in active if edge[1] > row]
+
+			# find where each active edge crosses this row, rounded to the nearest pixel
+			nodes.clear()
+			for top_y, bottom_y, top_x, bottom_x in active:
+				height = bottom_y - top_y
+				nodes.append(top_x + (2 * (row - top_y) * (bottom_x - top_x) + height) // (2 * height))
+			nodes.sort()
+
+			for i in range(0, len(nodes) - 1, 2):
+				self._span(nodes[i], nodes[i + 1], row, color)
+
+			# draw the caps on this row, unless a span already covered them
+			while next_cap < num_caps and caps[next_cap][0] < row:
+				next_cap += 1
+			while next_cap < num_caps and caps[next_cap][0] == row:
+				cap_x0 = caps[next_cap][1]
+				cap_x1 = caps[next_cap][2]
+				next_cap += 1
+				for i in range(0, len(nodes) - 1, 2):
+					if nodes[i] <= cap_x0 and cap_x1 <= nodes[i + 1]:
+						break
+				else:
+					self._span(cap_x0, cap_x1, row, color)
+
+	def _span(self, x0, x1, y, color):
+		"""
+		Write one horizontal span, clipped to the clip (see push_clip).
+
+		Args:
+			x0 (int): First column of the span
+			x1 (int): Last column of the span
+			y (int): Row of the span
+			color (int): 565 encoded color
+		"""
+		if y < self._clip_y0 or y >= self._clip_y1:
+			return
+		if x0 < self._clip_x0:
+			x0 = self._clip_x0
+		if x1 >= self._clip_x1:
+			x1 = self._clip_x1 - 1
+		if x0 > x1:
+			return
+		self._set_window(x0, y, x1, y)
+		self._write_fill(x1 - x0 + 1, color)
+
+	def _vspan(self, x, y0, y1, color):
+		"""
+		Write one vertical span, clipped to the clip (see push_clip).
+
+		Args:
+			x (int): Column of the span
+			y0 (int): First row of the span
+			y1 (int): Last row of the span
+			color (int): 565 encoded color
+		"""
+		if x < self._clip_x0 or x >= self._clip_x1:
+			return
+		if y0 < self._clip_y0:
+			y0 = self._clip_y0
+		if y1 >= self._clip_y1:
+			y1 = self._clip_y1 - 1
+		if y0 > y1:
+			return
+		self._set_window(x, y0, x, y1)
+		self._write_fill(y1 - y0 + 1, color)
+
+	def thick_line(self, x0, y0, x1, y1, width, color):
+		"""
+		Draw a line starting at x0, y0 and ending at x1, y1, that is 'width' pixels wide.
+
+		Horizontal and vertical lines are drawn as a single rectangle,
+		other lines are drawn as a filled polygon.
+
+		Args:
+			x0 (int): Start point x coordinate
+			y0 (int): Start point y coordinate
+			x1 (int): End point x coordinate
+			y1 (int): End point y coordinate
+			width (int): Width of the line in pixels
+			color (int): 565 encoded color
+		"""
+		if width <= 1:
+			self.line(x0, y0, x1, y1, color)
+			return
+
+		if y0 == y1:
+			self.fill_rect(min(x0, x1), y0 - width // 2, abs(x1 - x0) + 1, width, color)
+			return
+		if x0 == x1:
+			self.fill_rect(x0 - width // 2, min(y0, y1), width, abs(y1 - y0) + 1, color)
+			return
+
+		# offset both ends sideways by half the width
+		dx = x1 - x0
+		dy = y1 - y0
+		half = (width - 1) / (2 * sqrt(dx * dx + dy * dy))
+		off_x = round(-dy * half)
+		off_y = round(dx * half)
+		self.fill_polygon(
+			(
+				(x0 + off_x, y0 + off_y),
+				(x1 + off_x, y1 + off_y),
+				(x1 - off_x, y1 - off_y),
+				(x0 - off_x, y0 - off_y),
+			),
+			0,
+			0,
+			color,
+		)
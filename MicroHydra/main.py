@@ -1,3 +1,5 @@
+from lib import mhprofile
+mhprofile.start() # only does anything if the "boot_profile" option is on
 from machine import RTC, reset_cause, PWRON_RESET
 from sys import path
 
@@ -12,6 +14,7 @@ if reset_cause() != PWRON_RESET: #if this was not a power reset, we are probably
 	rtc = RTC()
 	app_path = rtc.memory().decode()
 	rtc.memory("/launcher/launcher.py") # just in case we reset again
+mhprofile.checkpoint("read app path")
 
 
 #add apps directory to PATH
@@ -28,8 +31,10 @@ if len(app_path) >= 4: # if the string is too short it cant possibly be on sd.
 			path.append('/sd/apps')
 		except OSError:
 			print("Could not mount SDCard!")
+		mhprofile.checkpoint("mount sd")
 
 
+mhprofile.checkpoint("main.py")
 
 try:
 	__import__(app_path)
@@ -0,0 +1,356 @@
+import sys
+import time
+
+#this script measures how much data the st7789fbuf driver sends to the display, and how long it takes.
+#it uses a fake SPI bus that just counts bytes, so it can run without a display attached.
+#run it from the "MicroHydra" folder, with the unix port of MicroPython (which includes framebuf):
+#	micropython ../misc/display_benchmark.py
+#it also works on the device itself, if you copy it over to the flash.
+
+sys.path.append('.')
+sys.path.append('MicroHydra')
+from lib import st7789fbuf as st7789
+from font import vga1_8x16 as font
+
+
+try:
+	ticks_us = time.ticks_us
+	ticks_diff = time.ticks_diff
+except AttributeError:
+	ticks_us = lambda: int(time.perf_counter() * 1_000_000)
+	ticks_diff = lambda a, b: a - b
+
+
+
+class FakePin:
+	def on(self):
+		pass
+	def off(self):
+		pass
+	def value(self, val=None):
+		pass
+
+class FakeSPI:
+	"""Stand-in for machine.SPI that counts what gets written to it."""
+	def __init__(self):
+		self.reset()
+	def reset(self):
+		self.bytes_written = 0
+		self.writes = 0
+	def write(self, data):
+		self.bytes_written += len(memoryview(data))
+		self.writes += 1
+
+
+
+def make_display():
+	spi = FakeSPI()
+	tft = st7789.ST7789(
+		spi,
+		135,
+		240,
+		reset=FakePin(),
+		cs=FakePin(),
+		dc=FakePin(),
+		backlight=None,
+		rotation=1,
+		color_order=st7789.BGR,
+		)
+	return tft, spi
+
+
+def run_test(name, tft, spi, draw, num_frames=50):
+	"""Call draw(frame) and then tft.show(), num_frames times, and print the results."""
+	spi.reset()
+	start_time = ticks_us()
+	for frame in range(num_frames):
+		draw(frame)
+		tft.show()
+	time_diff = ticks_diff(ticks_us(), start_time)
+
+	print(f"{name}:")
+	print(f"    {spi.bytes_written // num_frames} bytes, {spi.writes // num_frames} SPI writes, {time_diff // num_frames}us per frame")
+	return spi.bytes_written
+
+
+
+tft, spi = make_display()
+
+# IRC-style screen: a console full of text, and an input line that changes each frame
+for line in range(7):
+	tft.bitmap_text(font, f"<user{line}> hello this is a message", 0, line * 16, st7789.WHITE)
+tft.show()
+
+def draw_input_line(frame):
+	tft.fill_rect(0, 112, 240, 16, 0)
+	tft.bitmap_text(font, f"#channel> typing {frame}", 0, 112, st7789.YELLOW)
+
+def draw_input_line_full(frame):
+	draw_input_line(frame)
+	tft.mark_dirty() # force the whole display to be sent
+
+def draw_clock(frame):
+	tft.fill_rect(6, 2, 40, 16, 0)
+	tft.bitmap_text(font, f"12:{frame % 60:02d}", 6, 2, st7789.WHITE)
+
+def draw_clock_full(frame):
+	draw_clock(frame)
+	tft.mark_dirty()
+
+
+print("Testing...")
+print('')
+full = run_test("input line, full frame", tft, spi, draw_input_line_full)
+dirty = run_test("input line, dirty regions", tft, spi, draw_input_line)
+print(f"    {full // max(dirty, 1)}x less data")
+print('')
+full = run_test("clock digits, full frame", tft, spi, draw_clock_full)
+dirty = run_test("clock digits, dirty regions", tft, spi, draw_clock)
+print(f"    {full // max(dirty, 1)}x less data")
+print('')
+
+# apps that know exactly what changed can send it themselves
+def draw_status_bar(frame):
+	tft.fbuf.fill_rect(0, 0, 240, 18, 0)
+	tft.fbuf.text(f"status {frame}", 4, 5, 0xffff)
+	tft.show_region(0, 0, 240, 18)
+
+run_test("status bar, show_region", tft, spi, draw_status_bar)
+print('')
+
+# double buffering: how long is the caller blocked at once?
+tft = spi = None
+tft, spi = make_display()
+tft.fill(st7789.BLUE)
+start_time = ticks_us()
+tft.show()
+print(f"show(), full frame: blocked for {ticks_diff(ticks_us(), start_time)}us")
+
+tft = spi = None
+spi = FakeSPI()
+tft = st7789.ST7789(spi, 135, 240, reset=FakePin(), cs=FakePin(), dc=FakePin(), rotation=1, color_order=st7789.BGR, double_buffer=True)
+tft.fill(st7789.BLUE)
+start_time = ticks_us()
+tft.show_async()
+longest = ticks_diff(ticks_us(), start_time)
+steps = 0
+while True:
+	start_time = ticks_us()
+	more = tft.flush_step()
+	longest = max(longest, ticks_diff(ticks_us(), start_time))
+	steps += 1
+	if not more:
+		break
+print(f"show_async() + flush_step(), full frame: {steps} steps, blocked for at most {longest}us at once")
+print('')
+
+# redrawing a screen full of text should not allocate anything
+import gc
+try:
+	mem_alloc = gc.mem_alloc
+except AttributeError:
+	mem_alloc = lambda: 0
+
+tft = spi = None
+tft, spi = make_display()
+lines = [f"<user{i}> the quick brown fox {i}" for i in range(8)]
+def draw_console(frame):
+	tft.fill(0)
+	for idx, line in enumerate(lines):
+		tft.bitmap_text(font, line, 0, idx * 16, st7789.WHITE)
+
+draw_console(0) # warm up
+gc.collect()
+start_mem = mem_alloc()
+run_test("console redraw", tft, spi, draw_console, num_frames=10)
+print(f"    {(mem_alloc() - start_mem) // 10} bytes allocated per frame")
+print('')
+
+# large clock using a converted true-type font
+from font import NotoSansMono_32 as bigfont
+
+def draw_big_clock(frame):
+	tft.fill_rect(0, 40, 240, bigfont.HEIGHT, 0)
+	tft.write(bigfont, f"12:{frame % 60:02d}", 60, 40, st7789.WHITE)
+
+draw_big_clock(0)
+gc.collect()
+start_mem = mem_alloc()
+run_test("big clock, write()", tft, spi, draw_big_clock, num_frames=10)
+print(f"    {(mem_alloc() - start_mem) // 10} bytes allocated per frame")
+print('')
+
+# launcher-style icons, drawn straight from the 2 bit icon data
+from launcher.icons import icons, battery
+
+def draw_icons(frame):
+	tft.fill(0)
+	tft.bitmap_icons(icons, (icons.SDCARD, icons.FLASH, icons.GEAR, icons.RELOAD)[frame % 4], 0xffff, 104, 36)
+	tft.bitmap_icons(battery, battery.FULL, 0xffff, 210, 4)
+
+draw_icons(0)
+gc.collect()
+start_mem = mem_alloc()
+run_test("launcher icons, bitmap_icons()", tft, spi, draw_icons, num_frames=10)
+print(f"    {(mem_alloc() - start_mem) // 10} bytes allocated per frame")
+print('')
+
+# full-screen 8 bit palettized image, in both drivers
+from assets import testcard
+from lib import st7789py
+
+tft = spi = None
+gc.collect()
+tft, spi = make_display()
+start_time = ticks_us()
+tft.bitmap(testcard, 0, 0)
+print(f"testcard, st7789fbuf bitmap(): {ticks_diff(ticks_us(), start_time)}us (first draw)")
+start_time = ticks_us()
+tft.bitmap(testcard, 0, 0)
+print(f"testcard, st7789fbuf bitmap(): {ticks_diff(ticks_us(), start_time)}us")
+
+tft = spi = None
+gc.collect()
+spi = FakeSPI()
+tft = st7789py.ST7789(spi, 135, 240, reset=FakePin(), cs=FakePin(), dc=FakePin(), rotation=1, color_order=st7789py.BGR)
+start_time = ticks_us()
+tft.pbitmap(testcard, 0, 0)
+print(f"testcard, st7789py pbitmap(): {ticks_diff(ticks_us(), start_time)}us")
+print('')
+
+# indexed color mode: half the framebuffer memory, colors expanded during show()
+tft = spi = None
+gc.collect()
+spi = FakeSPI()
+start_mem = mem_alloc()
+tft = st7789.ST7789(spi, 135, 240, reset=FakePin(), cs=FakePin(), dc=FakePin(), rotation=1, color_order=st7789.BGR, indexed=True)
+print(f"indexed mode: {mem_alloc() - start_mem} bytes allocated by the driver")
+run_test("console redraw, indexed", tft, spi, draw_console, num_frames=10)
+run_test("input line, indexed, dirty regions", tft, spi, draw_input_line)
+print('')
+
+# scaled mode: draw at 120x68, stretched to fill the display in show()
+tft = spi = None
+gc.collect()
+spi = FakeSPI()
+start_mem = mem_alloc()
+tft = st7789.ST7789(spi, 135, 240, reset=FakePin(), cs=FakePin(), dc=FakePin(), rotation=1, color_order=st7789.BGR, scale=2)
+print(f"scale=2 ({tft.width}x{tft.height}): {mem_alloc() - start_mem} bytes allocated by the driver")
+
+def draw_bouncing_box(frame):
+	tft.fill(0)
+	tft.rect(frame % (tft.width - 10), frame % (tft.height - 10), 10, 10, st7789.RED, fill=True)
+
+run_test("bouncing box, scale=2", tft, spi, draw_bouncing_box)
+print('')
+
+# sprites and tiles: only moved sprites are redrawn, unless the map scrolls
+from lib.mhsprites import SpriteSheet, Sprite, TileMap, Scene
+
+tft = spi = None
+gc.collect()
+tft, spi = make_display()
+sheet = SpriteSheet(64, 16, 16, 16)
+for i in range(4):
+	sheet.fbuf.rect(i * 16, 0, 16, 16, tft.encode_color((st7789.RED, st7789.GREEN, st7789.BLUE, st7789.YELLOW)[i]), True)
+	sheet.fbuf.rect(i * 16 + 4, 4, 8, 8, 0, True)
+tiles = TileMap(sheet, 30, 9, bytearray((i % 3) for i in range(30 * 9)))
+scene = Scene(tft, tiles)
+sprites = [Sprite(sheet, 3, x=i * 20, y=i * 10, key=0) for i in range(10)]
+for sprite in sprites:
+	scene.add(sprite)
+
+def draw_sprites(frame):
+	for idx, sprite in enumerate(sprites):
+		sprite.move((frame * (idx + 1)) % 224, sprite.y)
+	scene.draw()
+
+def draw_sprites_scrolling(frame):
+	tiles.scroll_to(frame % 240, 0)
+	draw_sprites(frame)
+
+scene.draw()
+tft.show()
+run_test("10 moving sprites", tft, spi, draw_sprites)
+run_test("10 moving sprites, scrolling tile map", tft, spi, draw_sprites_scrolling)
+print('')
+
+# animated polygon: transformed in place with fixed point math
+import array
+shape = array.array('h', [0, 0, 40, 0, 40, 20, 20, 30, 0, 20])
+
+def draw_spinning_shape(frame):
+	tft.fill_rect(60, 20, 120, 100, 0)
+	tft.polygon(shape, 100, 50, st7789.WHITE, angle=frame * 0.1, scale=1.5, fill=True)
+
+draw_spinning_shape(0)
+gc.collect()
+start_mem = mem_alloc()
+run_test("spinning polygon", tft, spi, draw_spinning_shape, num_frames=10)
+print(f"    {(mem_alloc() - start_mem) // 10} bytes allocated per frame")
+print('')
+
+# blit_buffer() reuses the FrameBuffer it wraps around a buffer
+tft = spi = None
+gc.collect()
+tft, spi = make_display()
+sprite = bytearray(16 * 16 * 2)
+def draw_blit(frame):
+	tft.blit_buffer(sprite, frame % 224, 50, 16, 16)
+draw_blit(0)
+gc.collect()
+start_mem = mem_alloc()
+run_test("blit_buffer(), 16x16", tft, spi, draw_blit, num_frames=10)
+print(f"    {(mem_alloc() - start_mem) // 10} bytes allocated per frame")
+print('')
+
+# device colors skip encode_color() on every call
+colors = (st7789.RED, st7789.GREEN, st7789.BLUE, st7789.WHITE)
+device_colors = tuple(tft.device_color(color) for color in colors)
+for name, palette in (("565 colors", colors), ("device colors", device_colors)):
+	start_time = ticks_us()
+	for i in range(2000):
+		tft.pixel(i % 240, i % 135, palette[i & 3])
+	print(f"2000 pixel() calls, {name}: {ticks_diff(ticks_us(), start_time)}us")
+print('')
+
+# st7789py: filled shapes are sent as one window per row, instead of one per pixel
+tft = spi = None
+gc.collect()
+spi = FakeSPI()
+tft = st7789py.ST7789(spi, 135, 240, reset=FakePin(), cs=FakePin(), dc=FakePin(), rotation=1, color_order=st7789py.BGR)
+hexagon = [(30, 0), (60, 15), (60, 45), (30, 60), (0, 45), (0, 15), (30, 0)]
+
+spi.reset()
+start_time = ticks_us()
+tft.polygon(hexagon, 90, 35, st7789py.WHITE)
+print(f"st7789py polygon() outline: {spi.writes} SPI writes, {ticks_diff(ticks_us(), start_time)}us")
+spi.reset()
+start_time = ticks_us()
+tft.fill_polygon(hexagon, 90, 35, st7789py.WHITE)
+print(f"st7789py fill_polygon(): {spi.writes} SPI writes, {ticks_diff(ticks_us(), start_time)}us")
+spi.reset()
+start_time = ticks_us()
+tft.thick_line(20, 20, 220, 110, 4, st7789py.WHITE)
+print(f"st7789py thick_line(), 4px: {spi.writes} SPI writes, {ticks_diff(ticks_us(), start_time)}us")
+
+# st7789py: lines are sent as straight runs, instead of pixel by pixel
+from math import sin, cos
+spi.reset()
+start_time = ticks_us()
+for minute in range(0, 60, 5):
+	tft.line(120, 67, 120 + int(sin(minute / 9.55) * 60), 67 - int(cos(minute / 9.55) * 60), st7789py.WHITE)
+print(f"st7789py line(), 12 clock hands: {spi.writes} SPI writes, {ticks_diff(ticks_us(), start_time)}us")
+spi.reset()
+start_time = ticks_us()
+tft.lines([(10 + i * 20, 30 + (i % 2) * 70) for i in range(12)], st7789py.WHITE)
+print(f"st7789py lines(), 11 segments: {spi.writes} SPI writes, {ticks_diff(ticks_us(), start_time)}us")
+
+# st7789py: with a clip, only the visible part of a scrolling list is sent
+spi.reset()
+start_time = ticks_us()
+tft.push_clip(0, 20, 240, 95)
+for row in range(12):
+	tft.text(font, f"list item number {row}", 4, 6 + row * 16, st7789py.WHITE, st7789py.BLACK)
+tft.pop_clip()
+print(f"st7789py text(), 12 rows in a 95px pane: {spi.writes} SPI writes, {spi.bytes_written} bytes, {ticks_diff(ticks_us(), start_time)}us")
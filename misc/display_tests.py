@@ -0,0 +1,202 @@
+import sys
+
+#this script checks some st7789fbuf edge cases, by reading back what was drawn into the framebuf.
+#like display_benchmark.py, it uses a fake SPI bus, so it can run without a display attached.
+#run it from the "MicroHydra" folder, with the unix port of MicroPython (which includes framebuf):
+#	micropython ../misc/display_tests.py
+
+sys.path.append('.')
+sys.path.append('MicroHydra')
+from lib import st7789fbuf as st7789
+from launcher.icons import icons
+
+
+
+class FakePin:
+	def on(self):
+		pass
+	def off(self):
+		pass
+	def value(self, val=None):
+		pass
+
+class FakeSPI:
+	def write(self, data):
+		pass
+
+
+
+def make_display(**kwargs):
+	return st7789.ST7789(
+		FakeSPI(),
+		135,
+		240,
+		reset=FakePin(),
+		cs=FakePin(),
+		dc=FakePin(),
+		backlight=None,
+		rotation=1,
+		color_order=st7789.BGR,
+		**kwargs
+		)
+
+def read_area(tft, x, y, width, height):
+	"""Get the raw framebuf values in an area, row by row."""
+	return [tft.fbuf.pixel(x + col, y + row) for row in range(height) for col in range(width)]
+
+failures = 0
+def check(name, passed):
+	global failures
+	print(f"{'ok  ' if passed else 'FAIL'} {name}")
+	if not passed:
+		failures += 1
+
+
+
+# ~~~ bitmap_icons() ~~~
+# the icon's shape, as the set of pixels drawn by a normal color
+def icon_mask(tft, icon):
+	tft.fill(0)
+	tft.bitmap_icons(icons, icon, st7789.WHITE, 0, 0)
+	blank = tft.encode_color(0)
+	return [value != blank for value in read_area(tft, 0, 0, icons.WIDTH, icons.HEIGHT)]
+
+def icon_drawn(tft, icon, color, fill_color):
+	"""Check that every icon pixel was drawn with color, and the rest was left alone."""
+	mask = icon_mask(tft, icon)
+	tft.fill(fill_color)
+	tft.bitmap_icons(icons, icon, color, 0, 0)
+	fg = tft.encode_color(color)
+	bg = tft.encode_color(fill_color)
+	values = read_area(tft, 0, 0, icons.WIDTH, icons.HEIGHT)
+	return any(mask) and all(
+		value == (fg if drawn else bg) for value, drawn in zip(values, mask)
+		)
+
+tft = make_display()
+check("icon, black", icon_drawn(tft, icons.GEAR, st7789.BLACK, st7789.WHITE))
+# device_color(0) is not 0, but encodes to 0
+check("icon, device color black", icon_drawn(tft, icons.GEAR, tft.device_color(st7789.BLACK), st7789.WHITE))
+
+tft = None
+tft = make_display(indexed=True)
+# a full palette with one dark color, so black and the icon color both snap to index 0
+palette = [0x0841] + [0xf800 | i for i in range(1, 256)]
+tft.set_palette(palette)
+check("icon, full palette", icon_drawn(tft, icons.GEAR, 0x0020, palette[1]))
+check("icon, full palette, device color", icon_drawn(tft, icons.GEAR, tft.device_color(0x0020), palette[1]))
+
+
+
+# ~~~ polygons ~~~
+import array
+
+def raises_value_error(func):
+	try:
+		func()
+	except ValueError:
+		return True
+	return False
+
+shape = array.array('h', [0, 0, 40, 0, 40, 20, 0, 20])
+# the transform writes without bounds checks, so short arrays must be refused
+check("transform_points, short out", raises_value_error(
+	lambda: st7789.transform_points(shape, array.array('h', bytes(6 * 2)), 1.0)
+	))
+check("polygon, scratch of the wrong length", raises_value_error(
+	lambda: tft.polygon(shape, 10, 10, st7789.WHITE, angle=1.0, scratch=array.array('h', bytes(10 * 2)))
+	))
+check("polygon, scratch of the right length", not raises_value_error(
+	lambda: tft.polygon(shape, 10, 10, st7789.WHITE, angle=1.0, scratch=array.array('h', bytes(8 * 2)))
+	))
+
+
+
+# ~~~ clipping ~~~
+CLIP = (50, 30, 60, 40)
+
+def clip_respected(draw):
+	"""Check that draw() changes the same pixels inside the clip as it does unclipped, and none outside it."""
+	tft.fill(st7789.BLUE)
+	draw()
+	reference = read_area(tft, 0, 0, tft.width, tft.height)
+
+	tft.fill(st7789.BLUE)
+	tft.push_clip(*CLIP)
+	draw()
+	tft.pop_clip()
+	values = read_area(tft, 0, 0, tft.width, tft.height)
+
+	blank = tft.encode_color(st7789.BLUE)
+	clip_x, clip_y, clip_w, clip_h = CLIP
+	for idx, value in enumerate(values):
+		x, y = idx % tft.width, idx // tft.width
+		inside = clip_x <= x < clip_x + clip_w and clip_y <= y < clip_y + clip_h
+		if value != (reference[idx] if inside else blank):
+			return False
+	return True
+
+tft = None
+tft = make_display()
+
+from lib.mhimage import Image
+image = Image("assets/testcard.mhi")
+check("image, clipped", clip_respected(lambda: image.draw(tft, 0, 0)))
+
+from lib.mhsprites import SpriteSheet, Sprite, TileMap, Scene
+sheet = SpriteSheet(32, 16, 16, 16)
+sheet.fbuf.rect(0, 0, 16, 16, tft.encode_color(st7789.RED), True)
+sheet.fbuf.rect(16, 0, 16, 16, tft.encode_color(st7789.GREEN), True)
+scene = Scene(tft, TileMap(sheet, 15, 9, bytearray((i % 2) for i in range(15 * 9))))
+scene.add(Sprite(sheet, 0, x=40, y=20))
+
+def draw_scene():
+	scene.redraw()
+	scene.draw()
+check("sprites, clipped", clip_respected(draw_scene))
+
+# without a spare row after the framebuf, clips on the bottom edge use a wider view,
+# but the clip itself must not change
+tft = None
+tft = make_display(reserved_bytearray=bytearray(240 * 135 * 2))
+tft.push_clip(50, 100, 60, 35)
+check("no spare row, get_clip", tft.get_clip() == (50, 100, 60, 35))
+tft.push_clip(40, 110, 100, 10)
+check("no spare row, nested clip", tft.get_clip() == (50, 110, 60, 10))
+tft.pop_clip()
+check("no spare row, pop_clip", tft.get_clip() == (50, 100, 60, 35))
+tft.pop_clip()
+
+tft.fill(st7789.BLUE)
+tft.push_clip(50, 100, 60, 35)
+tft.fill(st7789.RED)
+tft.pixel(10, 110, st7789.RED)
+tft.vline(20, 100, 35, st7789.RED)
+tft.rect(0, 100, 40, 35, st7789.RED, fill=True)
+tft.pop_clip()
+red = tft.encode_color(st7789.RED)
+values = read_area(tft, 0, 0, tft.width, tft.height)
+check("no spare row, drawing stays in the clip", all(
+	(value == red) == (50 <= idx % tft.width < 110 and idx // tft.width >= 100)
+	for idx, value in enumerate(values)
+	))
+
+# images with more than 256 colors can't be drawn, and are rejected when opened
+import struct
+with open("display_tests.mhi", "wb") as f:
+	f.write(struct.pack("<3sBHHH", b"MHI", 1, 1, 1, 257))
+try:
+	Image("display_tests.mhi")
+	check("image, too many colors", False)
+except ValueError:
+	check("image, too many colors", True)
+import os
+os.remove("display_tests.mhi")
+
+
+
+print('')
+if failures:
+	print(f"{failures} checks failed")
+	sys.exit(1)
+print("all checks passed")
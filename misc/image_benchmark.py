@@ -0,0 +1,71 @@
+import sys
+import time
+import gc
+
+#this script compares drawing the testcard from the assets/testcard.py module, and from the streamed assets/testcard.mhi file.
+#it measures import/open time, decode/draw time, and how much memory is allocated.
+#it uses a fake SPI bus, so it can run without a display attached.
+#run it from the "MicroHydra" folder, with the unix port of MicroPython (which includes framebuf):
+#	micropython ../misc/image_benchmark.py
+#it also works on the device itself, if you copy it over to the flash.
+
+sys.path.append('.')
+sys.path.append('MicroHydra')
+from lib import st7789py
+from lib.mhimage import Image
+
+
+try:
+	ticks_us = time.ticks_us
+	ticks_diff = time.ticks_diff
+except AttributeError:
+	ticks_us = lambda: int(time.perf_counter() * 1_000_000)
+	ticks_diff = lambda a, b: a - b
+
+try:
+	mem_alloc = gc.mem_alloc
+except AttributeError:
+	mem_alloc = lambda: 0
+
+
+
+class FakePin:
+	def on(self):
+		pass
+	def off(self):
+		pass
+	def value(self, val=None):
+		pass
+
+class FakeSPI:
+	"""Stand-in for machine.SPI that counts what gets written to it."""
+	def __init__(self):
+		self.bytes_written = 0
+	def write(self, data):
+		self.bytes_written += len(data)
+
+
+def measure(name, func):
+	"""Run func once, and print how long it took and how much it allocated."""
+	gc.collect()
+	start_mem = mem_alloc()
+	start_time = ticks_us()
+	result = func()
+	time_diff = ticks_diff(ticks_us(), start_time)
+	print(f"{name}: {time_diff}us, {mem_alloc() - start_mem} bytes allocated")
+	return result
+
+
+spi = FakeSPI()
+tft = st7789py.ST7789(spi, 135, 240, reset=FakePin(), cs=FakePin(), dc=FakePin(), rotation=1, color_order=st7789py.BGR)
+
+print("Testing...")
+print('')
+testcard = measure("import assets.testcard", lambda: __import__("assets.testcard", None, None, ["testcard"]))
+measure("pbitmap(testcard)", lambda: tft.pbitmap(testcard, 0, 0))
+testcard = None
+print('')
+
+img = measure("open assets/testcard.mhi", lambda: Image("assets/testcard.mhi"))
+measure("decode only", lambda: [None for _ in img.rows()])
+measure("Image.draw()", lambda: img.draw(tft, 0, 0))
@@ -0,0 +1,138 @@
+import struct
+import sys
+
+#this script converts pictures into the ".mhi" streaming image format used by MicroHydra/lib/mhimage.py
+#it's meant to run on your computer, with python3 and Pillow installed (pip install pillow):
+#	python3 image_converter.py picture.png picture.mhi
+#	python3 image_converter.py photo.jpg photo.mhi --width 240 --height 135
+#pictures are reduced to 256 colors.
+#converted MicroHydra bitmap modules (like MicroHydra/assets/testcard.py) can also be converted, without Pillow:
+#	python3 image_converter.py ../MicroHydra/assets/testcard.py ../MicroHydra/assets/testcard.mhi
+#the encoding functions also work in MicroPython.
+
+MAGIC = b"MHI"
+VERSION = 1
+
+
+
+def pack_row(row):
+	"""Compress one row of palette indexes with PackBits."""
+	out = bytearray()
+	literal = bytearray()
+	length = len(row)
+	i = 0
+	while i < length:
+		run = 1
+		while i + run < length and run < 130 and row[i + run] == row[i]:
+			run += 1
+
+		if run >= 3:
+			if literal:
+				out.append(len(literal) - 1)
+				out.extend(literal)
+				literal = bytearray()
+			out.append(run + 125)
+			out.append(row[i])
+			i += run
+		else:
+			literal.append(row[i])
+			i += 1
+			if len(literal) == 128:
+				out.append(127)
+				out.extend(literal)
+				literal = bytearray()
+
+	if literal:
+		out.append(len(literal) - 1)
+		out.extend(literal)
+	return out
+
+
+def write_image(path, width, height, palette, indices):
+	"""
+	Write a .mhi file.
+	palette is a list of up to 256 RGB565 colors, indices is one palette index per pixel (width * height bytes).
+	Returns the size of the file.
+	"""
+	if not 0 < len(palette) <= 256:
+		raise ValueError("Palette must have 1 to 256 colors.")
+	if len(indices) != width * height:
+		raise ValueError("Wrong number of pixels for the image size.")
+
+	size = 0
+	with open(path, "wb") as f:
+		size += f.write(struct.pack("<3sBHHH", MAGIC, VERSION, width, height, len(palette)))
+		size += f.write(struct.pack(f"<{len(palette)}H", *palette))
+		for y in range(height):
+			packed = pack_row(indices[y * width:(y + 1) * width])
+			size += f.write(struct.pack("<H", len(packed)))
+			size += f.write(packed)
+	return size
+
+
+def from_bitmap_module(path):
+	"""Read a converted MicroHydra bitmap module (.py), returning (width, height, palette, indices)."""
+	bitmap = {}
+	with open(path) as f:
+		exec(f.read(), bitmap)
+
+	width = bitmap["WIDTH"]
+	height = bitmap["HEIGHT"]
+	bpp = bitmap["BPP"]
+	data = bitmap["BITMAP"]
+	palette = list(bitmap["PALETTE"])
+	if bpp > 8:
+		raise ValueError("Only bitmaps with up to 8 bits per pixel can be converted.")
+
+	indices = bytearray(width * height)
+	bs_bit = 0
+	for i in range(width * height):
+		color_index = 0
+		for _ in range(bpp):
+			color_index = (color_index << 1) | ((data[bs_bit >> 3] >> (7 - (bs_bit & 7))) & 1)
+			bs_bit += 1
+		indices[i] = color_index
+	return width, height, palette, indices
+
+
+def from_picture(path, width=None, height=None):
+	"""Read a picture with Pillow, returning (width, height, palette, indices)."""
+	from PIL import Image
+
+	img = Image.open(path).convert("RGB")
+	if width or height:
+		width = width or img.width * height // img.height
+		height = height or img.height * width // img.width
+		img = img.resize((width, height), Image.LANCZOS)
+
+	img = img.quantize(colors=256)
+	rgb = img.getpalette()
+	num_colors = max(img.getdata()) + 1
+	palette = []
+	for i in range(num_colors):
+		red, green, blue = rgb[i * 3:i * 3 + 3]
+		palette.append(((red & 0xF8) << 8) | ((green & 0xFC) << 3) | (blue >> 3))
+	return img.width, img.height, palette, bytes(img.getdata())
+
+
+def main():
+	import argparse
+
+	parser = argparse.ArgumentParser(description="Convert a picture to a MicroHydra .mhi image.")
+	parser.add_argument("input", help="picture file, or a converted bitmap module (.py)")
+	parser.add_argument("output", help=".mhi file to write")
+	parser.add_argument("--width", type=int, help="resize to this width")
+	parser.add_argument("--height", type=int, help="resize to this height")
+	args = parser.parse_args()
+
+	if args.input.endswith(".py"):
+		width, height, palette, indices = from_bitmap_module(args.input)
+	else:
+		width, height, palette, indices = from_picture(args.input, args.width, args.height)
+
+	size = write_image(args.output, width, height, palette, indices)
+	print(f"{args.output}: {width}x{height}, {len(palette)} colors, {size} bytes ({size * 100 // (width * height * 2)}% of RGB565)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,94 @@
+import sys
+import time
+import gc
+
+#this script checks how much memory the st7789py driver allocates while drawing.
+#once everything is warmed up (glyphs cached, buffers sized), redrawing the same things should not allocate anything.
+#it uses a fake SPI bus, so it can run without a display attached.
+#run it from the "MicroHydra" folder, with the unix port of MicroPython:
+#	micropython ../misc/st7789py_benchmark.py
+#it also works on the device itself, if you copy it over to the flash.
+
+sys.path.append('.')
+sys.path.append('MicroHydra')
+from lib import st7789py
+from font import vga1_8x16 as font
+from font import NotoSansMono_32 as bigfont
+
+
+try:
+	ticks_us = time.ticks_us
+	ticks_diff = time.ticks_diff
+except AttributeError:
+	ticks_us = lambda: int(time.perf_counter() * 1_000_000)
+	ticks_diff = lambda a, b: a - b
+
+try:
+	mem_alloc = gc.mem_alloc
+	tracemalloc = None
+except AttributeError:
+	# CPython frees objects right away, so the best we can do there is the peak memory use.
+	# (expect a few bytes of noise, ints are objects in CPython)
+	import tracemalloc
+	tracemalloc.start()
+	mem_alloc = lambda: tracemalloc.get_traced_memory()[1]
+
+
+
+class FakePin:
+	def on(self):
+		pass
+	def off(self):
+		pass
+	def value(self, val=None):
+		pass
+
+class FakeSPI:
+	"""Stand-in for machine.SPI that counts what gets written to it."""
+	def __init__(self):
+		self.bytes_written = 0
+		self.writes = 0
+	def write(self, data):
+		self.bytes_written += len(data)
+		self.writes += 1
+
+
+def measure(name, draw, num_calls=20):
+	"""Call draw() once to warm up, then num_calls times, and print the time and memory allocated per call."""
+	draw()
+	gc.collect()
+	if tracemalloc:
+		tracemalloc.reset_peak()
+	start_mem = mem_alloc()
+	start_time = ticks_us()
+	for _ in range(num_calls):
+		draw()
+	time_diff = ticks_diff(ticks_us(), start_time)
+	if tracemalloc:
+		print(f"{name}: {time_diff // num_calls}us, peak of {mem_alloc() - start_mem} bytes allocated")
+	else:
+		print(f"{name}: {time_diff // num_calls}us, {(mem_alloc() - start_mem) // num_calls} bytes allocated per call")
+
+
+spi = FakeSPI()
+tft = st7789py.ST7789(spi, 135, 240, reset=FakePin(), cs=FakePin(), dc=FakePin(), rotation=1, color_order=st7789py.BGR)
+
+print("Testing...")
+print('')
+measure("fill()", lambda: tft.fill(st7789py.BLUE))
+measure("fill_rect(), 100x50", lambda: tft.fill_rect(10, 10, 100, 50, st7789py.RED))
+
+def draw_stripes():
+	tft.fill_rect(10, 10, 30, 7, st7789py.RED)
+	tft.fill_rect(10, 20, 30, 7, st7789py.GREEN)
+measure("fill_rect(), alternating colors", draw_stripes)
+
+def draw_crosshair():
+	tft.hline(0, 67, 240, st7789py.WHITE)
+	tft.vline(120, 0, 135, st7789py.WHITE)
+measure("hline() + vline()", draw_crosshair)
+
+measure("pixel()", lambda: tft.pixel(5, 5, st7789py.YELLOW))
+measure("line()", lambda: tft.line(0, 0, 239, 134, st7789py.CYAN))
+measure("text(), 8x16 font", lambda: tft.text(font, "the quick brown fox", 0, 100, st7789py.WHITE, st7789py.BLACK))
+measure("write(), 32px true-type font", lambda: tft.write(bigfont, "12:34 pm", 40, 40, st7789py.WHITE, st7789py.BLACK))